@@ -19,6 +19,6 @@ echo "Populating sample data..."
 python manage.py populate_movies
 
 echo "Running tests to verify build integrity..."
-python manage.py test movie.tests --verbosity=1
+python run_tests.py --fast
 
 echo "Build completed successfully!"
\ No newline at end of file
@@ -0,0 +1,37 @@
+"""
+Gunicorn settings, picked up automatically when gunicorn starts in the
+project root (see Procfile).
+"""
+
+import gc
+import os
+
+# Gunicorn reads every module-level name that matches one of its settings,
+# and ``config`` is one of them.
+from decouple import config as env
+
+workers = env('WEB_CONCURRENCY', default=2, cast=int)
+
+# Import and warm the app once in the master (see movieapp_lab9/wsgi.py);
+# forked workers then share its memory pages copy-on-write.
+preload_app = env('GUNICORN_PRELOAD', default=True, cast=bool)
+
+
+def pre_fork(server, worker):
+    # Move everything allocated so far out of the collector's reach, so
+    # collections in the workers don't touch (and copy) the shared pages.
+    gc.freeze()
+
+
+def when_ready(server):
+    # Rate-limit buckets live in the cache. A per-process cache gives every
+    # worker its own buckets, multiplying each client's allowance.
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'movieapp_lab9.settings')
+    from django.conf import settings
+
+    if settings.RATE_LIMIT_ENABLED and not settings.CACHE_IS_SHARED and server.cfg.workers > 1:
+        server.log.warning(
+            'Rate limits are enforced per worker: %s is not shared, so each of the '
+            '%d workers keeps its own buckets and a client gets up to %d times its '
+            'RATE_LIMITS. Set CACHE_BACKEND to Redis or Memcached to share them.',
+            settings.CACHE_BACKEND, server.cfg.workers, server.cfg.workers)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Movie
+from .models import Job, Movie, SlowQuery
 
 # TODO: Admin functionality not fully implemented
 # Basic admin interface for development purposes only
@@ -8,3 +8,20 @@ class MovieAdmin(admin.ModelAdmin):
     list_display = ['name', 'genre', 'updated']
     list_filter = ['genre', 'updated']
     search_fields = ['name', 'genre']
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['task', 'status', 'progress', 'progress_message', 'attempts', 'updated']
+    list_filter = ['status', 'task']
+    readonly_fields = ['attempts', 'progress', 'progress_message', 'last_error', 'worker',
+                       'created', 'updated']
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ['view', 'sql', 'count', 'total_ms', 'max_ms', 'last_seen']
+    list_filter = ['view']
+    ordering = ['-total_ms']
+    readonly_fields = ['fingerprint', 'view', 'sql', 'count', 'total_ms', 'max_ms',
+                       'last_params', 'explain', 'first_seen', 'last_seen']
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MovieConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'movie'
+
+    def ready(self):
+        # Connect signal handlers and register background tasks
+        from . import signals, tasks  # noqa: F401
@@ -0,0 +1,123 @@
+"""
+Performance budgets for the views in ``movie/urls.py``.
+
+Each URL name declares how many queries it may run, how many rows those
+queries may fetch and how long a request may take, measured with empty caches
+against ``SEED_MOVIES`` movies. ``ViewBudgetTestMixin`` checks them in the test
+suite, so an N+1, an unbounded query or a slow render fails the build with the
+offending SQL listed.
+"""
+
+import time
+from contextlib import ExitStack
+
+from django.core.cache import cache
+from django.db import connections
+from django.urls import reverse
+
+from . import urls
+from .models import Movie, make_excerpt
+from .slowqueries import QueryTimer
+
+# Size of the catalog the budgets are measured against.
+SEED_MOVIES = 100
+SEED_GENRES = ['Drama', 'Action', 'Crime', 'Sci-Fi', 'Comedy', 'Horror', 'Romance']
+
+BUDGETS = {
+    'home': {'max_queries': 0, 'max_rows': 0, 'max_render_ms': 50},
+    # The list page shows the whole catalog by design.
+    'movie_list': {'max_queries': 1, 'max_rows': SEED_MOVIES, 'max_render_ms': 250},
+    'movie_detail': {'max_queries': 1, 'max_rows': 1, 'max_render_ms': 50},
+    'movie_search': {
+        'max_queries': 1,
+        'max_rows': SEED_MOVIES // 5,
+        'max_render_ms': 150,
+        'query': {'genre': 'Drama'},
+    },
+}
+
+# Requests per view; the fastest one is compared with max_render_ms.
+RENDER_RUNS = 3
+
+
+def seed_movies():
+    movies = []
+    for i in range(SEED_MOVIES):
+        description = f'Budget description {i} ' * 20
+        movies.append(Movie(
+            name=f'Budget Movie {i}',
+            genre=SEED_GENRES[i % len(SEED_GENRES)],
+            description=description,
+            excerpt=make_excerpt(description),
+        ))
+    Movie.objects.bulk_create(movies)
+
+
+def url_names():
+    return [pattern.name for pattern in urls.urlpatterns if pattern.name]
+
+
+def budget_url(url_name):
+    pattern = next(p for p in urls.urlpatterns if p.name == url_name)
+    # Every parameterized route takes a movie id.
+    kwargs = {name: Movie.objects.values_list('id', flat=True).first()
+              for name in pattern.pattern.converters}
+    return reverse(url_name, kwargs=kwargs)
+
+
+def count_rows(alias, sql, params):
+    with connections[alias].cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM ({sql}) budget_rows', params)
+        return cursor.fetchone()[0]
+
+
+def measure(client, url, query=None):
+    """Request ``url`` with empty caches; return (best time in ms, queries).
+
+    ``queries`` lists ``(sql, params, rows)`` for the last request, with rows
+    ``None`` for statements other than SELECT.
+    """
+    best_ms = None
+    for _ in range(RENDER_RUNS):
+        cache.clear()
+        timer = QueryTimer(threshold_ms=0)  # collects every query
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            started = time.perf_counter()
+            response = client.get(url, query or {})
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        if response.status_code != 200:
+            raise AssertionError(f'{url} returned {response.status_code}')
+        best_ms = elapsed_ms if best_ms is None else min(best_ms, elapsed_ms)
+
+    queries = []
+    for alias, sql, params, many, _ in timer.slow:
+        is_select = not many and sql.lstrip().upper().startswith('SELECT')
+        queries.append((sql, params, count_rows(alias, sql, params) if is_select else None))
+    return best_ms, queries
+
+
+class ViewBudgetTestMixin:
+    """TestCase mixin adding ``assertWithinBudget(url_name)``."""
+
+    def assertWithinBudget(self, url_name):
+        budget = BUDGETS.get(url_name)
+        if budget is None:
+            self.fail(f'{url_name} has no entry in movie.budgets.BUDGETS')
+        render_ms, queries = measure(self.client, budget_url(url_name), budget.get('query'))
+        rows = sum(row_count or 0 for _, _, row_count in queries)
+
+        problems = []
+        if len(queries) > budget['max_queries']:
+            problems.append(f"{len(queries)} queries (max {budget['max_queries']})")
+        if rows > budget['max_rows']:
+            problems.append(f"{rows} rows fetched (max {budget['max_rows']})")
+        if render_ms > budget['max_render_ms']:
+            problems.append(f"{render_ms:.0f}ms (max {budget['max_render_ms']}ms)")
+        if problems:
+            listing = '\n'.join(
+                f'  {i}. [{"-" if row_count is None else row_count} rows] {sql} {params!r}'
+                for i, (sql, params, row_count) in enumerate(queries, 1))
+            self.fail(f"{url_name} is over budget: {'; '.join(problems)}\n"
+                      f"Queries:\n{listing or '  (none)'}")
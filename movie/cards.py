@@ -0,0 +1,56 @@
+import functools
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+CARD_TEMPLATE = 'movie/includes/movie_card.html'
+
+
+@functools.lru_cache(maxsize=None)
+def card_template_version():
+    """Short hash of the card template's source.
+
+    Part of every card and grid key, so a deploy that changes the template
+    never serves cards rendered by the old one from a cache that outlives it.
+    """
+    source = get_template(CARD_TEMPLATE).template.source
+    return hashlib.md5(source.encode()).hexdigest()[:12]
+
+
+def card_cache_key(movie):
+    """Cache key for a rendered card; changes whenever the movie is saved."""
+    return f'movie-card:{card_template_version()}:{movie.id}:{movie.updated.timestamp()}'
+
+
+def render_movie_cards(movies):
+    """Return the rendered card grid HTML for ``movies``, in order.
+
+    Cards are shared by the list and search pages and cached per
+    ``(movie.id, movie.updated)``. The joined grid is cached too, keyed on the
+    card keys it contains, so a repeat page is a single cache hit and a new
+    combination of movies only renders the cards of new or edited movies.
+    """
+    keys = [card_cache_key(movie) for movie in movies]
+    grid_key = f'movie-grid:{card_template_version()}:' + hashlib.md5('|'.join(keys).encode()).hexdigest()
+    grid = cache.get(grid_key)
+    if grid is None:
+        grid = '\n'.join(_render_cards(movies, keys))
+        cache.set(grid_key, grid, settings.MOVIE_CARD_CACHE_TIMEOUT)
+    return mark_safe(grid)
+
+
+def _render_cards(movies, keys):
+    cached = cache.get_many(keys)
+    missing = {}
+    template = None
+    for key, movie in zip(keys, movies):
+        if key not in cached:
+            template = template or get_template(CARD_TEMPLATE)
+            missing[key] = template.render({'movie': movie})
+    if missing:
+        cache.set_many(missing, settings.MOVIE_CARD_CACHE_TIMEOUT)
+        cached.update(missing)
+    return [cached[key] for key in keys]
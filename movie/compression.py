@@ -0,0 +1,125 @@
+import gzip
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from .routing import resolve_url_name
+from .signals import catalog_version
+
+try:
+    import brotli
+except ImportError:  # optional: fall back to gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript')
+
+
+def preferred_encoding(accept_encoding):
+    """Pick ``'br'``, ``'gzip'`` or ``None`` for an Accept-Encoding header."""
+    accepted = set()
+    for part in accept_encoding.split(','):
+        coding, _, params = part.partition(';')
+        params = params.replace(' ', '')
+        try:
+            quality = float(params[2:]) if params.startswith('q=') else 1.0
+        except ValueError:
+            quality = 0.0
+        if quality > 0:
+            accepted.add(coding.strip().lower())
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(content, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class CompressedPageMiddleware:
+    """Compress public HTML pages and cache the compressed bytes.
+
+    Applies to GET requests for the URL names in ``COMPRESSED_PAGE_VIEWS``.
+    Bodies of at least ``COMPRESSION_MIN_SIZE`` bytes are sent brotli-encoded
+    when the ``brotli`` package is installed and the client accepts it, gzip
+    otherwise. Successful responses are cached per (catalog version, encoding,
+    URL) for ``PAGE_CACHE_TIMEOUT`` seconds, headers included, so a hit skips
+    the view, the template and the compressor.
+
+    The admin is deliberately left out: compressing pages that carry CSRF
+    tokens next to reflected input invites BREACH-style attacks.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.views = frozenset(settings.COMPRESSED_PAGE_VIEWS)
+
+    def __call__(self, request):
+        if request.method != 'GET' or resolve_url_name(request) not in self.views:
+            return self.get_response(request)
+
+        encoding = preferred_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        key = self.cache_key(request, encoding)
+        cached = cache.get(key) if settings.PAGE_CACHE_TIMEOUT else None
+        if cached is not None:
+            return self.response_from_cache(cached)
+
+        response = self.get_response(request)
+        self.compress_response(response, encoding)
+        if settings.PAGE_CACHE_TIMEOUT and self.is_cacheable(response):
+            cache.set(
+                key,
+                (list(response.items()), response.content),
+                settings.PAGE_CACHE_TIMEOUT,
+            )
+        return response
+
+    def cache_key(self, request, encoding):
+        url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+        return f'page:{catalog_version()}:{encoding or "identity"}:{url}'
+
+    def is_cacheable(self, response):
+        cache_control = response.get('Cache-Control', '')
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and 'private' not in cache_control
+            and 'no-store' not in cache_control
+        )
+
+    def response_from_cache(self, cached):
+        headers, content = cached
+        response = HttpResponse(content)
+        for header, value in headers:
+            response[header] = value
+        return response
+
+    def compress_response(self, response, encoding):
+        content_type = response.get('Content-Type', '')
+        if (
+            response.streaming
+            or response.has_header('Content-Encoding')
+            or not content_type.startswith(COMPRESSIBLE_TYPES)
+        ):
+            return
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if encoding is None or len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return
+
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        # A strong ETag would claim byte-equality with the identity body.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
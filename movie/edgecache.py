@@ -0,0 +1,188 @@
+"""
+HTTP caching by a CDN or reverse proxy in front of the app.
+
+``EdgeCacheMiddleware`` gives the views listed in ``EDGE_CACHE_POLICIES`` a
+public ``Cache-Control`` header (browser ``max-age``, a longer proxy
+``s-maxage`` and ``stale-while-revalidate``) plus any extra ``Vary``. Views tag
+their responses with ``Surrogate-Key`` values naming the movies and genres
+they show. When a movie is saved or deleted, :class:`PurgeDispatcher` asks the
+proxy at ``PURGE_URL`` to drop just the responses carrying its keys.
+
+Unless ``CACHE_IS_SHARED``, other workers keep serving pages from their own
+page cache for up to ``PAGE_CACHE_TIMEOUT`` seconds after an edit, and the
+proxy could refill from one of them right after the purge and keep that stale
+page for its whole ``s-maxage``. Edits are therefore purged a second time once
+those pages have expired.
+
+Keys: ``movie-<id>`` and ``genre-<slug>`` for the movies on a page, and
+``movies`` on every listing (list and search pages).
+"""
+
+import logging
+import queue
+import threading
+import time
+import urllib.request
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.text import slugify
+
+from .routing import resolve_url_name
+
+logger = logging.getLogger(__name__)
+
+LISTING_KEY = 'movies'
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def movie_key(movie_id):
+    return f'movie-{movie_id}'
+
+
+def genre_key(genre):
+    return f'genre-{slugify(genre)}'
+
+
+def tag_response(response, movies, listing=False):
+    """Set the ``Surrogate-Key`` header for a page showing ``movies``.
+
+    Listings with more than ``SURROGATE_KEY_MAX_MOVIES`` movies only carry
+    ``movies`` and their genres, to keep the header within proxy limits.
+    """
+    keys = []
+    if listing:
+        keys.append(LISTING_KEY)
+    if len(movies) <= settings.SURROGATE_KEY_MAX_MOVIES:
+        keys.extend(movie_key(movie.id) for movie in movies)
+    keys.extend(sorted({genre_key(movie.genre) for movie in movies}))
+    if keys:
+        response[settings.SURROGATE_KEY_HEADER] = ' '.join(keys)
+    return response
+
+
+def purge_keys_for(movie):
+    # Any edit changes ``updated``, which can move the movie in every listing
+    # sorted or filtered by date, so listings are always purged with it.
+    return [movie_key(movie.pk), LISTING_KEY]
+
+
+class EdgeCacheMiddleware:
+    """Apply ``EDGE_CACHE_POLICIES`` to successful GET/HEAD responses."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS or response.status_code != 200:
+            return response
+        policy = settings.EDGE_CACHE_POLICIES.get(resolve_url_name(request))
+        if policy is None or response.has_header('Cache-Control'):
+            return response
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=policy['max_age'],
+            s_maxage=policy.get('s_maxage', policy['max_age']),
+            stale_while_revalidate=policy.get('stale_while_revalidate', 0),
+        )
+        if policy.get('vary'):
+            patch_vary_headers(response, policy['vary'])
+        return response
+
+
+def send_purge(keys):
+    headers = {settings.PURGE_KEY_HEADER: ' '.join(keys)}
+    if settings.PURGE_AUTH_HEADER:
+        headers[settings.PURGE_AUTH_HEADER] = settings.PURGE_AUTH_TOKEN
+    request = urllib.request.Request(
+        settings.PURGE_URL, method=settings.PURGE_METHOD, headers=headers)
+    with urllib.request.urlopen(request, timeout=settings.PURGE_TIMEOUT) as response:
+        response.read()
+
+
+class PurgeDispatcher:
+    """Sends purge requests from a background thread.
+
+    Saving a movie never waits on the proxy. Keys queued while a request is
+    in flight are merged into the next one, so a bulk import sends a handful
+    of purges rather than one per movie.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.delayed = {}  # key -> monotonic time it is due to be purged again
+        self.timer = None
+
+    def purge_edit(self, keys):
+        """Purge the keys of an edited movie now and, if needed, once more later."""
+        self.purge(keys)
+        if settings.PURGE_URL and settings.PAGE_CACHE_TIMEOUT and not settings.CACHE_IS_SHARED:
+            self.purge_later(keys, settings.PAGE_CACHE_TIMEOUT + 1)
+
+    def purge_later(self, keys, delay):
+        """Purge ``keys`` after ``delay`` seconds, using a single timer thread."""
+        due = time.monotonic() + delay
+        with self.lock:
+            for key in keys:
+                self.delayed[key] = due
+            if self.timer is None or not self.timer.is_alive():
+                self._start_timer()
+
+    def _start_timer(self):
+        delay = max(min(self.delayed.values()) - time.monotonic(), 0)
+        self.timer = threading.Timer(delay, self._purge_due)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def _purge_due(self):
+        now = time.monotonic()
+        with self.lock:
+            keys = sorted(key for key, due in self.delayed.items() if due <= now)
+            for key in keys:
+                del self.delayed[key]
+            self.timer = None
+            if self.delayed:
+                self._start_timer()
+        if keys:
+            self.purge(keys)
+
+    def purge(self, keys):
+        if not settings.PURGE_URL:
+            return
+        self.queue.put(keys)
+        with self.lock:
+            # Also restarts the thread in a worker forked from a preloaded master.
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run, name='movie-purge', daemon=True)
+                self.thread.start()
+
+    def run(self):
+        while True:
+            keys = set(self.queue.get())
+            batched = 1
+            while True:
+                try:
+                    keys.update(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+                batched += 1
+            try:
+                send_purge(sorted(keys))
+            except OSError as exc:
+                logger.warning('Purge of %s failed: %s', ' '.join(sorted(keys)), exc)
+            finally:
+                for _ in range(batched):
+                    self.queue.task_done()
+
+    def join(self):
+        """Block until every queued purge has been sent (or has failed)."""
+        self.queue.join()
+
+
+dispatcher = PurgeDispatcher()
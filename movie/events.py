@@ -0,0 +1,240 @@
+"""
+Server-Sent Events feed of catalog changes for the ASGI application.
+
+Movie signal handlers append to the ``MovieEvent`` table. Each ASGI worker
+runs one :class:`Broadcaster` whose single poller reads new events and fans
+them out to every connected client, so idle subscribers cost a queue and a
+coroutine each instead of a database query or page render. Event ids are the
+table's primary keys, which lets a client reconnect to any worker and resume
+with ``Last-Event-ID``.
+
+Ids are assigned on insert but become visible on commit, so a slow
+transaction can make id N visible after N+1. The poller therefore publishes
+strictly in id order and holds events back behind a gap in the ids until the
+missing ones commit, or for at most ``SSE_GAP_TIMEOUT`` seconds since a
+rolled-back insert leaves a gap for good.
+"""
+
+import asyncio
+import datetime
+import json
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+from django.utils import timezone
+
+from .models import MovieEvent
+
+logger = logging.getLogger(__name__)
+
+
+async def fetch_events(after_id, limit, until=None):
+    events = MovieEvent.objects.filter(id__gt=after_id)
+    if until is not None:
+        events = events.filter(id__lte=until)
+    return [event async for event in events.order_by('id')[:limit]]
+
+
+async def latest_event_id():
+    event = await MovieEvent.objects.order_by('-id').only('id').afirst()
+    return event.id if event else 0
+
+
+def prune_events():
+    """Delete events older than ``SSE_EVENT_RETENTION``; run by ``run_jobs``."""
+    cutoff = timezone.now() - datetime.timedelta(seconds=settings.SSE_EVENT_RETENTION)
+    deleted, _ = MovieEvent.objects.filter(created__lt=cutoff).delete()
+    return deleted
+
+
+def format_event(event):
+    data = json.dumps({'action': event.action, 'movie': event.data})
+    return f'id: {event.id}\nevent: movie.{event.action}\ndata: {data}\n\n'.encode()
+
+
+class Subscription:
+    def __init__(self):
+        self.queue = asyncio.Queue(maxsize=settings.SSE_QUEUE_SIZE)
+        # Set when the client fell too far behind; its stream then ends and
+        # the client catches up by reconnecting with Last-Event-ID.
+        self.overflowed = False
+
+
+class Broadcaster:
+    """Fans new MovieEvents out to the subscribers in this process."""
+
+    def __init__(self):
+        self.subscribers = set()
+        self.last_id = None
+        self.loop = None
+        self.wakeup = None
+        self.ready = None
+        self.poller = None
+        self.gap_since = None
+
+    def subscribe(self):
+        subscription = Subscription()
+        self.subscribers.add(subscription)
+        loop = asyncio.get_running_loop()
+        if self.poller is None or self.poller.done() or self.loop is not loop:
+            self.loop = loop
+            self.wakeup = asyncio.Event()
+            self.ready = asyncio.Event()
+            self.poller = loop.create_task(self.poll())
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self.subscribers.discard(subscription)
+        if not self.subscribers and self.poller is not None:
+            self.poller.cancel()
+            self.poller = None
+            self.last_id = None
+            self.gap_since = None
+
+    def polling(self):
+        return self.poller is not None and not self.poller.done()
+
+    def notify(self):
+        """Wake the poller now instead of at its next interval.
+
+        Safe to call from any thread, e.g. from a signal handler running in
+        a sync view.
+        """
+        loop, wakeup = self.loop, self.wakeup
+        if loop is not None and wakeup is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wakeup.set)
+
+    async def poll(self):
+        failures = 0
+        while True:
+            delay = settings.SSE_POLL_INTERVAL
+            try:
+                if self.last_id is None:
+                    self.last_id = await latest_event_id()
+                    self.ready.set()
+                await self.poll_once()
+                failures = 0
+            except DatabaseError:
+                # A dropped connection or a database restart must not end the
+                # only poller this worker has; back off and try again.
+                failures += 1
+                delay = min(delay * 2 ** failures, settings.SSE_POLL_MAX_BACKOFF)
+                logger.exception('Polling movie events failed, retrying in %.1fs', delay)
+                # The async ORM runs on one long-lived thread that never sees
+                # request_finished, so drop its broken connection here.
+                await sync_to_async(close_old_connections)()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+
+    async def poll_once(self):
+        """Publish the events after ``last_id`` up to the first unexpired gap."""
+        for event in await fetch_events(self.last_id, settings.SSE_BACKLOG_LIMIT):
+            if event.id != self.last_id + 1:
+                if self.gap_since is None:
+                    self.gap_since = time.monotonic()
+                if time.monotonic() - self.gap_since < settings.SSE_GAP_TIMEOUT:
+                    return
+            self.gap_since = None
+            self.last_id = event.id
+            self.publish(event)
+
+    def publish(self, event):
+        for subscription in list(self.subscribers):
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                subscription.overflowed = True
+                self.subscribers.discard(subscription)
+
+
+broadcaster = Broadcaster()
+
+
+def parse_last_event_id(scope):
+    headers = dict(scope.get('headers', []))
+    value = headers.get(b'last-event-id', b'').decode('latin-1').strip()
+    return int(value) if value.isdigit() else None
+
+
+async def stream(subscription, send, last_event_id):
+    async def send_chunk(body):
+        await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+
+    await send_chunk(f'retry: {settings.SSE_RETRY_MS}\n\n'.encode())
+    sent_id = last_event_id or 0
+    if last_event_id is not None:
+        # Replay no further than the poller has published, so the backlog
+        # never jumps a gap the poller is still waiting on. Page through it
+        # until caught up; live events meanwhile wait in the queue.
+        while not broadcaster.ready.is_set():
+            if not broadcaster.polling():
+                return  # the client reconnects and resumes from last_event_id
+            try:
+                await asyncio.wait_for(broadcaster.ready.wait(), settings.SSE_HEARTBEAT)
+            except asyncio.TimeoutError:
+                await send_chunk(b': ping\n\n')
+        until = broadcaster.last_id
+        while sent_id < until:
+            events = await fetch_events(sent_id, settings.SSE_BACKLOG_LIMIT, until=until)
+            if not events:
+                break
+            for event in events:
+                await send_chunk(format_event(event))
+                sent_id = event.id
+
+    while not (subscription.overflowed and subscription.queue.empty()):
+        try:
+            event = await asyncio.wait_for(subscription.queue.get(), settings.SSE_HEARTBEAT)
+        except asyncio.TimeoutError:
+            if not broadcaster.polling():
+                return  # no more events would come; make the client reconnect
+            await send_chunk(b': ping\n\n')
+            continue
+        # Skip live events already sent as part of the resume backlog.
+        if event.id > sent_id:
+            await send_chunk(format_event(event))
+            sent_id = event.id
+
+
+async def wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def sse_application(scope, receive, send):
+    """ASGI app streaming MovieEvents as ``text/event-stream``."""
+    if scope['method'] != 'GET':
+        await send({'type': 'http.response.start', 'status': 405,
+                    'headers': [(b'allow', b'GET')]})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+
+    subscription = broadcaster.subscribe()
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        streamer = asyncio.ensure_future(
+            stream(subscription, send, parse_last_event_id(scope)))
+        disconnect = asyncio.ensure_future(wait_for_disconnect(receive))
+        done, pending = await asyncio.wait(
+            {streamer, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        if streamer in done:
+            streamer.result()
+            await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        broadcaster.unsubscribe(subscription)
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .routing import resolve_request
+
+# Template engine (see TEMPLATES in settings) without the auth and messages
+# context processors, used for pages served by the fast path.
+PUBLIC_TEMPLATE_ENGINE = 'public'
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def template_engine_for(request):
+    """Return the template engine alias a view should render with."""
+    if getattr(request, 'fast_path', False):
+        return PUBLIC_TEMPLATE_ENGINE
+    return None
+
+
+class PublicFastPathMiddleware:
+    """Serve the anonymous, read-only catalog pages with a short middleware chain.
+
+    GET/HEAD requests for the URL names listed in ``PUBLIC_FAST_PATH_VIEWS`` are
+    dispatched straight to their view from here, so the session, CSRF, auth and
+    messages middleware that sit below this one in ``MIDDLEWARE`` never run for
+    them. Everything else (notably ``/admin/``) goes through the full stack.
+
+    Only list views here that never read ``request.user``, ``request.session``
+    or messages and that render no forms needing a CSRF token.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PUBLIC_FAST_PATH:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.views = frozenset(settings.PUBLIC_FAST_PATH_VIEWS)
+
+    def __call__(self, request):
+        if request.method in SAFE_METHODS:
+            match = resolve_request(request)
+            if match is not None and match.url_name in self.views:
+                request.fast_path = True
+                request.resolver_match = match
+                response = match.func(request, *match.args, **match.kwargs)
+                if hasattr(response, 'render') and callable(response.render):
+                    response = response.render()
+                return response
+        return self.get_response(request)
@@ -0,0 +1,190 @@
+"""
+Lightweight DB-backed job queue.
+
+Tasks are plain functions registered with ``@task('name')`` and queued with
+``enqueue('name', **payload)``. ``manage.py run_jobs`` starts worker processes,
+each running jobs on a thread pool. Jobs are claimed with a conditional
+UPDATE, so any number of workers can share the table without a broker, and
+failed jobs are retried with exponential backoff up to ``max_attempts``.
+"""
+
+import datetime
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+from django.db.models import F
+from django.utils import timezone
+
+from .events import prune_events
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+
+def task(name):
+    """Register the decorated function as the task ``name``.
+
+    The function is called as ``func(context, **payload)`` where ``context``
+    is a :class:`JobContext`.
+    """
+    def register(func):
+        TASKS[name] = func
+        return func
+    return register
+
+
+def enqueue(name, max_attempts=3, delay=0, **payload):
+    """Queue task ``name`` with a JSON-serializable ``payload``."""
+    if name not in TASKS:
+        raise ValueError(f'Unknown task: {name}')
+    return Job.objects.create(
+        task=name,
+        payload=payload,
+        max_attempts=max_attempts,
+        run_after=timezone.now() + datetime.timedelta(seconds=delay),
+    )
+
+
+class JobContext:
+    """Handed to running tasks so they can report progress."""
+
+    def __init__(self, job):
+        self.job = job
+
+    def checkpoint(self, **state):
+        """Merge ``state`` into the payload a retry of the job is called with.
+
+        Call it inside the transaction whose work it records, so the saved
+        state never runs ahead of (or behind) what was committed.
+        """
+        self.job.payload = {**self.job.payload, **state}
+        Job.objects.filter(pk=self.job.pk).update(payload=self.job.payload)
+
+    def progress(self, done, total, message=''):
+        percent = int(done * 100 / total) if total else 100
+        Job.objects.filter(pk=self.job.pk).update(
+            progress=min(percent, 100),
+            progress_message=message[:200],
+            updated=timezone.now(),
+        )
+
+
+def claim_next(worker_id):
+    """Atomically claim the next due job for ``worker_id``, or return None."""
+    due = (
+        Job.objects.filter(status=Job.QUEUED, run_after__lte=timezone.now())
+        .order_by('run_after', 'id')
+        .values_list('id', flat=True)[:10]
+    )
+    for job_id in due:
+        # Only one worker's UPDATE can match while the job is still queued.
+        claimed = Job.objects.filter(pk=job_id, status=Job.QUEUED).update(
+            status=Job.RUNNING,
+            worker=worker_id,
+            attempts=F('attempts') + 1,
+            updated=timezone.now(),
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def run_job(job):
+    """Run a claimed job and record the outcome, scheduling a retry on failure."""
+    try:
+        TASKS[job.task](JobContext(job), **job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            delay = settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.QUEUED,
+                run_after=timezone.now() + datetime.timedelta(seconds=delay),
+                last_error=error,
+                updated=timezone.now(),
+            )
+            logger.warning('Job %s failed (attempt %s), retrying in %ss',
+                           job, job.attempts, delay)
+        else:
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.FAILED, last_error=error, updated=timezone.now())
+            logger.error('Job %s failed permanently', job)
+    else:
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.DONE, progress=100, updated=timezone.now())
+        logger.info('Job %s done', job)
+
+
+def requeue_stale():
+    """Put back jobs whose worker stopped reporting (e.g. it was killed)."""
+    cutoff = timezone.now() - datetime.timedelta(seconds=settings.JOB_STALE_AFTER)
+    return Job.objects.filter(status=Job.RUNNING, updated__lt=cutoff).update(
+        status=Job.QUEUED, updated=timezone.now())
+
+
+class Worker:
+    """Claims jobs and runs them on a pool of ``threads`` threads."""
+
+    def __init__(self, threads=None, poll_interval=None):
+        self.threads = threads or settings.JOB_WORKER_THREADS
+        self.poll_interval = poll_interval or settings.JOB_POLL_INTERVAL
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = threading.Event()
+
+    def run_pending(self):
+        """Run due jobs one after another until none are left; return the count."""
+        count = 0
+        while (job := claim_next(self.worker_id)) is not None:
+            run_job(job)
+            count += 1
+        return count
+
+    def prune_events(self):
+        """Prune the SSE change log, whether or not anyone is subscribed."""
+        try:
+            deleted = prune_events()
+        except DatabaseError:
+            logger.exception('Could not prune old movie events')
+        else:
+            logger.info('Pruned %s old movie event(s)', deleted)
+
+    def run_forever(self):
+        slots = threading.BoundedSemaphore(self.threads)
+        requeue_stale()
+        next_prune = 0.0
+        with ThreadPoolExecutor(max_workers=self.threads,
+                                thread_name_prefix='movie-job') as pool:
+            while not self.stopping.is_set():
+                if time.monotonic() >= next_prune:
+                    next_prune = time.monotonic() + settings.SSE_PRUNE_INTERVAL
+                    self.prune_events()
+                slots.acquire()
+                job = claim_next(self.worker_id)
+                if job is None:
+                    slots.release()
+                    close_old_connections()
+                    self.stopping.wait(self.poll_interval)
+                    continue
+                pool.submit(self._run_in_thread, job, slots)
+
+    def _run_in_thread(self, job, slots):
+        try:
+            run_job(job)
+        except Exception:
+            logger.exception('Could not record the outcome of job %s', job)
+        finally:
+            close_old_connections()
+            slots.release()
+
+    def stop(self):
+        self.stopping.set()
+
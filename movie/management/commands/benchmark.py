@@ -0,0 +1,172 @@
+import time
+from contextlib import contextmanager
+
+from django.core import signals
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, transaction
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+
+from movie.models import Movie, make_excerpt
+
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+@contextmanager
+def persistent_connections():
+    """Keep the benchmark's transaction open across handler requests.
+
+    Like the test client, stop request_started/request_finished from closing
+    the database connection, which would otherwise discard the seeded rows.
+    """
+    signals.request_started.disconnect(close_old_connections)
+    signals.request_finished.disconnect(close_old_connections)
+    try:
+        yield
+    finally:
+        signals.request_started.connect(close_old_connections)
+        signals.request_finished.connect(close_old_connections)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the public catalog pages (runs against a throwaway dataset)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=300,
+                            help='Requests per URL and mode (default: 300)')
+        parser.add_argument('--movies', type=int, default=100,
+                            help='Movies to seed before measuring (default: 100)')
+        parser.add_argument('--rounds', type=int, default=5,
+                            help='Alternating rounds per mode; the best is kept (default: 5)')
+
+    def handle(self, *args, **options):
+        self.rounds = options['rounds']
+        self.factory = RequestFactory()
+        # Seed inside a transaction that is always rolled back, so the
+        # benchmark never leaves rows behind in a real database.
+        with transaction.atomic(), persistent_connections():
+            self.seed(options['movies'])
+            with override_settings(ALLOWED_HOSTS=['testserver'], RATE_LIMIT_ENABLED=False):
+                self.benchmark_fast_path(options['requests'])
+                self.benchmark_card_cache(options['requests'])
+                self.benchmark_compression(options['requests'])
+            transaction.set_rollback(True)
+
+    def seed(self, count):
+        genres = ['Drama', 'Action', 'Crime', 'Sci-Fi', 'Comedy', 'Horror', 'Romance']
+        movies = []
+        for i in range(count):
+            description = f'Benchmark description {i} ' * 20
+            movies.append(Movie(
+                name=f'Benchmark Movie {i}',
+                genre=genres[i % len(genres)],
+                description=description,
+                excerpt=make_excerpt(description),
+            ))
+        Movie.objects.bulk_create(movies)
+        self.first_movie_id = Movie.objects.values_list('id', flat=True).first()
+
+    def public_urls(self):
+        return [
+            reverse('home'),
+            reverse('movie_list'),
+            reverse('movie_detail', kwargs={'id': self.first_movie_id}),
+            reverse('movie_search') + '?genre=Drama',
+        ]
+
+    def get(self, handler, url, **extra):
+        """Issue one GET through ``handler``; return (status, body bytes)."""
+        environ = self.factory.get(url, **extra).environ
+        status = []
+        body = b''.join(handler(environ, lambda s, headers: status.append(s)))
+        return status[0], body
+
+    def measure(self, url, requests, **extra):
+        """Return (CPU seconds, wall seconds) per request for ``url``.
+
+        A fresh WSGIHandler is built so it picks up the current settings'
+        middleware, exactly as a newly started gunicorn worker would.
+        """
+        handler = WSGIHandler()
+        status, _ = self.get(handler, url, **extra)  # warm templates and URL resolver
+        if not status.startswith('200'):
+            raise CommandError(f'{url} returned {status}')
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        for _ in range(requests):
+            self.get(handler, url, **extra)
+        cpu = time.process_time() - cpu_start
+        wall = time.perf_counter() - wall_start
+        return cpu / requests, wall / requests
+
+    def compare(self, url, requests, modes, **extra):
+        """Measure ``url`` under each ``{label: settings}`` mode.
+
+        Modes are interleaved over several rounds and the best round is kept,
+        which keeps one-off scheduler noise out of the comparison.
+        """
+        best = {label: (float('inf'), float('inf')) for label in modes}
+        for _ in range(self.rounds):
+            for label, mode_settings in modes.items():
+                with override_settings(**mode_settings):
+                    cpu, wall = self.measure(url, requests, **extra)
+                best[label] = (min(best[label][0], cpu), min(best[label][1], wall))
+        return best
+
+    def report_cpu(self, title, urls, requests, baseline, candidate):
+        """Print per-request CPU for two ``(label, settings)`` modes per URL."""
+        (base_label, base_settings), (cand_label, cand_settings) = baseline, candidate
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        self.stdout.write(
+            f'{"URL":<24} {base_label:>12} {cand_label:>12} {"CPU saved":>20}'
+        )
+        modes = {'base': base_settings, 'cand': cand_settings}
+        for url in urls:
+            results = self.compare(url, requests, modes)
+            base, cand = results['base'][0], results['cand'][0]
+            saved = (base - cand) / base * 100 if base else 0
+            self.stdout.write(
+                f'{url[:24]:<24} {base * 1e6:>10.0f}us {cand * 1e6:>10.0f}us '
+                f'{(base - cand) * 1e6:>10.0f}us {saved:>7.1f}%'
+            )
+
+    # Both modes skip the page cache; otherwise every request after the first
+    # is a cache hit and neither the fast path nor the cards get exercised.
+    def benchmark_fast_path(self, requests):
+        self.report_cpu(
+            'Anonymous fast path', self.public_urls(), requests,
+            ('full stack', {'PUBLIC_FAST_PATH': False, 'PAGE_CACHE_TIMEOUT': 0}),
+            ('fast path', {'PUBLIC_FAST_PATH': True, 'PAGE_CACHE_TIMEOUT': 0}),
+        )
+
+    def benchmark_card_cache(self, requests):
+        self.report_cpu(
+            'Movie card fragment cache', self.public_urls()[1::2], requests,
+            ('uncached', {'CACHES': NO_CACHE, 'PAGE_CACHE_TIMEOUT': 0}),
+            ('cached', {'PAGE_CACHE_TIMEOUT': 0}),
+        )
+
+    def benchmark_compression(self, requests):
+        self.stdout.write(self.style.MIGRATE_HEADING('Compressed page cache'))
+        self.stdout.write(
+            f'{"URL":<24} {"identity":>10} {"gzip":>10} {"br":>10} '
+            f'{"plain":>10} {"compressed":>11} {"cached":>10}'
+        )
+        modes = {
+            'plain': {'COMPRESSED_PAGE_VIEWS': []},
+            'compressed': {'PAGE_CACHE_TIMEOUT': 0},
+            'cached': {},
+        }
+        accept = {'HTTP_ACCEPT_ENCODING': 'br, gzip'}
+        for url in self.public_urls():
+            sizes = {}
+            for label, encoding in (('identity', ''), ('gzip', 'gzip'), ('br', 'br')):
+                _, body = self.get(WSGIHandler(), url, HTTP_ACCEPT_ENCODING=encoding)
+                sizes[label] = len(body)
+            wall = {label: result[1] for label, result
+                    in self.compare(url, requests, modes, **accept).items()}
+            self.stdout.write(
+                f'{url[:24]:<24} {sizes["identity"]:>9}B {sizes["gzip"]:>9}B {sizes["br"]:>9}B '
+                f'{wall["plain"] * 1e6:>8.0f}us {wall["compressed"] * 1e6:>9.0f}us '
+                f'{wall["cached"] * 1e6:>8.0f}us'
+            )
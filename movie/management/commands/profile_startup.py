@@ -0,0 +1,118 @@
+import datetime
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter so every import and cache starts cold.
+PROBE = r'''
+import json, os, sys, time
+
+preload, url = sys.argv[1] == 'preload', sys.argv[2]
+phases = {}
+mark = time.perf_counter()
+
+def phase(name):
+    global mark
+    now = time.perf_counter()
+    phases[name] = round((now - mark) * 1000, 2)
+    mark = now
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'movieapp_lab9.settings')
+import django
+from django.conf import settings
+settings.INSTALLED_APPS
+phase('settings')
+django.setup()
+phase('apps')
+from movie import warmup
+if preload:
+    warmup.warm_urls()
+    phase('url_resolver')
+    warmup.warm_templates()
+    phase('templates')
+    warmup.warm_caches()
+    phase('caches')
+from django.core.handlers.wsgi import WSGIHandler
+handler = WSGIHandler()
+phase('handler')
+status = warmup.request(handler, url)
+phase('first_request')
+print(json.dumps({'phases': phases, 'status': status}))
+'''
+
+
+class Command(BaseCommand):
+    help = 'Profile a cold start: import time, app loading and the first request'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/',
+                            help='URL requested as the first request (default: /)')
+        parser.add_argument('--top', type=int, default=15,
+                            help='Slowest top-level imports to list (default: 15)')
+        parser.add_argument('--output',
+                            help='Append the results as one JSON line to this file')
+
+    def handle(self, *args, **options):
+        cold = self.probe('cold', options['url'])
+        preload = self.probe('preload', options['url'])
+        imports = self.import_times()
+
+        self.report('Cold start', cold)
+        self.report('Preloaded start (warmed before the first request)', preload)
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\nSlowest top-level imports (of {len(imports)} total)"))
+        for name, cumulative in sorted(imports.items(), key=lambda i: -i[1])[:options['top']]:
+            self.stdout.write(f'  {name:<45} {cumulative / 1000:8.1f}ms')
+
+        if options['output']:
+            record = {
+                'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                'url': options['url'],
+                'cold': cold['phases'],
+                'preload': preload['phases'],
+                'import_ms': round(sum(imports.values()) / 1000, 2),
+            }
+            with open(options['output'], 'a') as output:
+                output.write(json.dumps(record) + '\n')
+            self.stdout.write(f"\nAppended results to {options['output']}")
+
+    def run_probe(self, *args, python_options=()):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'movieapp_lab9.settings')}
+        result = subprocess.run(
+            [sys.executable, *python_options, '-c', PROBE, *args],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True)
+        if result.returncode:
+            raise CommandError(f'Startup probe failed:\n{result.stderr}')
+        return result
+
+    def probe(self, mode, url):
+        result = json.loads(self.run_probe(mode, url).stdout.splitlines()[-1])
+        if not result['status'].startswith('200'):
+            raise CommandError(f"{url} returned {result['status']}")
+        return result
+
+    def import_times(self):
+        """Cumulative microseconds per top-level import, from ``-X importtime``."""
+        result = self.run_probe('cold', '/', python_options=['-X', 'importtime'])
+        imports = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            # Nested imports are indented two spaces per level.
+            if not name.startswith('  '):
+                imports[name.strip()] = int(cumulative)
+        return imports
+
+    def report(self, title, result):
+        phases = result['phases']
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{title}'))
+        for name, ms in phases.items():
+            self.stdout.write(f'  {name:<15} {ms:8.1f}ms')
+        total = sum(phases.values())
+        self.stdout.write(f"  {'total':<15} {total:8.1f}ms")
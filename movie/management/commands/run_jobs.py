@@ -0,0 +1,71 @@
+import multiprocessing
+import signal
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+def run_worker(threads, poll_interval):
+    # Under the spawn start method (macOS, Windows) the child starts from a
+    # fresh interpreter, so Django must be set up before the models import.
+    django.setup()
+    from movie.jobs import Worker
+
+    worker = Worker(threads=threads, poll_interval=poll_interval)
+    signal.signal(signal.SIGTERM, lambda *args: worker.stop())
+    signal.signal(signal.SIGINT, lambda *args: worker.stop())
+    worker.run_forever()
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (imports, cache warming) and prune old events until stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=settings.JOB_WORKER_PROCESSES,
+                            help='Worker processes to start (default: JOB_WORKER_PROCESSES)')
+        parser.add_argument('--threads', type=int, default=settings.JOB_WORKER_THREADS,
+                            help='Threads per worker process (default: JOB_WORKER_THREADS)')
+        parser.add_argument('--poll-interval', type=float, default=settings.JOB_POLL_INTERVAL,
+                            help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='Run the jobs that are due now in this process, then exit')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            from movie.jobs import Worker
+
+            worker = Worker()
+            worker.prune_events()
+            count = worker.run_pending()
+            self.stdout.write(self.style.SUCCESS(f'Ran {count} job(s)'))
+            return
+
+        processes = max(1, options['processes'])
+        self.stdout.write(
+            f'Starting {processes} worker process(es) with {options["threads"]} thread(s) each'
+        )
+        if processes == 1:
+            run_worker(options['threads'], options['poll_interval'])
+            return
+
+        # Children must open their own database connections.
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(
+                target=run_worker,
+                args=(options['threads'], options['poll_interval']),
+                name=f'movie-jobs-{i}',
+            )
+            for i in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        signal.signal(signal.SIGTERM, lambda *args: [w.terminate() for w in workers])
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.join()
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from movie.models import SlowQuery
+
+ORDERINGS = {
+    'total': F('total_ms').desc(),
+    'count': F('count').desc(),
+    'max': F('max_ms').desc(),
+}
+
+
+class Command(BaseCommand):
+    help = 'List the slowest query fingerprints recorded by the slow-query log'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10,
+                            help='Number of fingerprints to list (default: 10)')
+        parser.add_argument('--order', choices=ORDERINGS, default='total',
+                            help='Rank by total time, count or worst time (default: total)')
+        parser.add_argument('--view', help='Only list queries run by this view name')
+        parser.add_argument('--explain', action='store_true',
+                            help='Also print the last captured query plan')
+        parser.add_argument('--reset', action='store_true',
+                            help='Delete all recorded slow queries and exit')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            deleted, _ = SlowQuery.objects.all().delete()
+            self.stdout.write(f'Deleted {deleted} slow query records')
+            return
+
+        entries = SlowQuery.objects.order_by(ORDERINGS[options['order']])
+        if options['view']:
+            entries = entries.filter(view=options['view'])
+        entries = entries[:options['top']]
+        if not entries:
+            self.stdout.write('No slow queries recorded')
+            return
+
+        for rank, entry in enumerate(entries, 1):
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'\n#{rank} {entry.view or "-"} [{entry.fingerprint[:12]}]'))
+            self.stdout.write(
+                f'  {entry.count} calls, {entry.total_ms:.0f}ms total, '
+                f'{entry.avg_ms:.1f}ms avg, {entry.max_ms:.1f}ms max, '
+                f'last seen {entry.last_seen:%Y-%m-%d %H:%M}')
+            self.stdout.write(f'  {entry.sql}')
+            self.stdout.write(f'  last params: {entry.last_params}')
+            if options['explain'] and entry.explain:
+                self.stdout.write('  plan:')
+                for line in entry.explain.splitlines():
+                    self.stdout.write(f'    {line}')
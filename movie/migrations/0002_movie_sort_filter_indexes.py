@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movie', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['genre', 'updated'], name='movie_genre_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['name', 'id'], name='movie_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['updated', 'id'], name='movie_updated_id_idx'),
+        ),
+    ]
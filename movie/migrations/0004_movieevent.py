@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movie', '0003_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovieEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('create', 'Create'), ('update', 'Update'), ('delete', 'Delete')], max_length=10)),
+                ('movie_id', models.BigIntegerField()),
+                ('data', models.JSONField(default=dict)),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
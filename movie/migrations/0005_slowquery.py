@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movie', '0004_movieevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=40)),
+                ('view', models.CharField(blank=True, max_length=200)),
+                ('sql', models.TextField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total_ms', models.FloatField(default=0)),
+                ('max_ms', models.FloatField(default=0)),
+                ('last_params', models.TextField(blank=True)),
+                ('explain', models.TextField(blank=True)),
+                ('first_seen', models.DateTimeField(auto_now_add=True)),
+                ('last_seen', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'slow queries',
+                'constraints': [models.UniqueConstraint(fields=('fingerprint', 'view'), name='slowquery_fingerprint_view_uniq')],
+            },
+        ),
+    ]
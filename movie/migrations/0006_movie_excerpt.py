@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:15
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+
+def fill_excerpts(apps, schema_editor):
+    # Same rule as movie.models.make_excerpt, frozen for this migration.
+    Movie = apps.get_model('movie', 'Movie')
+    batch = []
+    for movie in Movie.objects.only('id', 'description').iterator(chunk_size=500):
+        excerpt = Truncator(movie.description or '').words(15, truncate=' …')
+        movie.excerpt = Truncator(excerpt).chars(300)
+        batch.append(movie)
+        if len(batch) == 500:
+            Movie.objects.bulk_update(batch, ['excerpt'])
+            batch = []
+    Movie.objects.bulk_update(batch, ['excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movie', '0005_slowquery'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movie',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
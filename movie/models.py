@@ -2,13 +2,136 @@
 
 # Create your models here.
 from django.db import models
+from django.utils import timezone
+from django.utils.text import Truncator
+
+EXCERPT_WORDS = 15
+EXCERPT_MAX_LENGTH = 300
+
+
+def make_excerpt(description):
+    """The short description shown on movie cards (like ``truncatewords:15``)."""
+    excerpt = Truncator(description or '').words(EXCERPT_WORDS, truncate=' …')
+    return Truncator(excerpt).chars(EXCERPT_MAX_LENGTH)
+
+
+class MovieQuerySet(models.QuerySet):
+    def for_listing(self):
+        """Load only what list and search pages show, leaving out ``description``."""
+        return self.only('id', 'name', 'genre', 'excerpt', 'updated')
+
 
 class Movie(models.Model):
     name = models.CharField(max_length=200)
     genre = models.CharField(max_length=200)
     description = models.TextField(null=True, blank=True)
+    # Stored copy of the start of description, so listings never load it.
+    excerpt = models.CharField(max_length=EXCERPT_MAX_LENGTH, blank=True, editable=False)
     updated = models.DateTimeField(auto_now=True)
 
+    objects = MovieQuerySet.as_manager()
+
+    class Meta:
+        # Back the sort/filter options in MovieFilterForm
+        indexes = [
+            models.Index(fields=['genre', 'updated'], name='movie_genre_updated_idx'),
+            models.Index(fields=['name', 'id'], name='movie_name_id_idx'),
+            models.Index(fields=['updated', 'id'], name='movie_updated_id_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if 'description' not in self.get_deferred_fields():
+            self.excerpt = make_excerpt(self.description)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'description' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        super().save(*args, **kwargs)
+
+
+class MovieEvent(models.Model):
+    """Change log of Movie creates, updates and deletes, streamed over SSE."""
+
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+    ACTION_CHOICES = [
+        (CREATE, 'Create'),
+        (UPDATE, 'Update'),
+        (DELETE, 'Delete'),
+    ]
+
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    movie_id = models.BigIntegerField()
+    data = models.JSONField(default=dict)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f'{self.action} movie {self.movie_id}'
+
+
+class Job(models.Model):
+    """A unit of background work picked up by ``manage.py run_jobs``."""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    progress = models.PositiveSmallIntegerField(default=0)
+    progress_message = models.CharField(max_length=200, blank=True)
+    last_error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.task} #{self.pk} ({self.status})'
+
+
+class SlowQuery(models.Model):
+    """Slow SQL aggregated by normalized fingerprint and view (see slowqueries.py)."""
+
+    fingerprint = models.CharField(max_length=40)
+    view = models.CharField(max_length=200, blank=True)
+    sql = models.TextField()
+    count = models.PositiveIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    last_params = models.TextField(blank=True)
+    explain = models.TextField(blank=True)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['fingerprint', 'view'],
+                                    name='slowquery_fingerprint_view_uniq'),
+        ]
+        verbose_name_plural = 'slow queries'
+
+    def __str__(self):
+        return f'{self.view or "-"}: {self.sql[:60]}'
+
+    @property
+    def avg_ms(self):
+        return self.total_ms / self.count if self.count else 0
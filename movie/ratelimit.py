@@ -0,0 +1,136 @@
+"""
+Per-client rate limiting and load shedding.
+
+``RateLimitMiddleware`` keeps one token bucket per client and URL name for the
+routes in ``RATE_LIMITS``. A client may burst ``burst`` requests, refilled at
+``rate`` per second, and gets a 429 with ``Retry-After`` beyond that. Clients
+are identified by a known API key or else their IP address.
+
+Buckets live in the cache backend, so a shared backend (see ``CACHE_BACKEND``)
+shares them between workers; with the default per-process cache every worker
+enforces the limits on its own (gunicorn.conf.py warns about it at startup).
+Each bucket is a single integer, its theoretical arrival time in milliseconds
+(GCRA), updated with the backend's ``incr``. Only Redis and Memcached
+increment atomically; with them concurrent workers can't both spend the last
+token. The file and database backends implement ``incr``
+as a read followed by a write, so concurrent requests may lose increments and
+let a client slightly over its limit. Either way the limiter errs on the side
+of letting requests through, never of rejecting them.
+
+Requests that waited longer than ``LOAD_SHED_QUEUE_MS`` in front of the app
+(per the proxy's ``X-Request-Start`` header) are answered with a 503 straight
+away, so an overloaded server drops work instead of letting latency grow.
+"""
+
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+
+from .routing import resolve_url_name
+
+
+def client_id(request):
+    """Return the key identifying the client that sent ``request``."""
+    api_key = request.META.get(settings.RATE_LIMIT_API_KEY_HEADER)
+    if api_key and api_key in settings.RATE_LIMIT_API_KEYS:
+        return 'key:' + hashlib.sha1(api_key.encode()).hexdigest()[:16]
+
+    # Each proxy in front of the app appends the address it received the
+    # request from; anything further left may have been sent by the client.
+    forwarded = [part.strip() for part in
+                 request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if part.strip()]
+    proxies = settings.RATE_LIMIT_PROXY_COUNT
+    if proxies and len(forwarded) >= proxies:
+        return 'ip:' + forwarded[-proxies]
+    return 'ip:' + request.META.get('REMOTE_ADDR', '')
+
+
+def take_token(key, rate, burst, now_ms=None):
+    """Spend one token from bucket ``key``; return 0 or seconds to wait.
+
+    ``rate`` is the refill rate in tokens per second and ``burst`` the bucket
+    size. The bucket stores the time at which it would be full again.
+    Exact only on backends with an atomic ``incr`` (Redis, Memcached); see the
+    module docstring.
+    """
+    now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+    interval = max(int(1000 / rate), 1)
+    capacity = interval * burst
+    timeout = math.ceil(capacity / 1000) + 1
+
+    try:
+        full_at = cache.incr(key, interval)
+    except ValueError:
+        cache.add(key, now_ms, timeout)
+        full_at = cache.incr(key, interval)
+    if full_at - interval < now_ms:
+        # The bucket had filled up completely since its last use. The set()
+        # can overwrite a concurrent worker's increment, so after an idle
+        # period a simultaneous burst may get one extra token per worker.
+        full_at = now_ms + interval
+        cache.set(key, full_at, timeout)
+    else:
+        cache.touch(key, timeout)
+
+    if full_at - now_ms <= capacity:
+        return 0
+    cache.decr(key, interval)  # the request is rejected, so give the token back
+    return (full_at - now_ms - capacity) / 1000
+
+
+def queue_time_ms(request, now_ms=None):
+    """Milliseconds since the proxy received ``request``, or None.
+
+    Understands ``X-Request-Start`` as ``t=<seconds>`` (nginx) or as a bare
+    timestamp in seconds, milliseconds or microseconds.
+    """
+    value = request.META.get('HTTP_X_REQUEST_START', '').strip()
+    if value.startswith('t='):
+        value = value[2:]
+    try:
+        started = float(value)
+    except ValueError:
+        return None
+    if started > 1e14:
+        started /= 1000  # microseconds
+    elif started < 1e11:
+        started *= 1000  # seconds
+    now_ms = time.time() * 1000 if now_ms is None else now_ms
+    return max(now_ms - started, 0)
+
+
+def too_busy(status, retry_after, message):
+    response = HttpResponse(message, status=status, content_type='text/plain')
+    response['Retry-After'] = str(max(math.ceil(retry_after), 1))
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+class RateLimitMiddleware:
+    """Shed queued-up requests and enforce ``RATE_LIMITS`` per client."""
+
+    def __init__(self, get_response):
+        if not settings.RATE_LIMIT_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if settings.LOAD_SHED_QUEUE_MS:
+            waited = queue_time_ms(request)
+            if waited is not None and waited > settings.LOAD_SHED_QUEUE_MS:
+                return too_busy(503, settings.LOAD_SHED_RETRY_AFTER,
+                                'Server busy, please retry shortly.')
+
+        url_name = resolve_url_name(request)
+        limit = settings.RATE_LIMITS.get(url_name)
+        if limit is not None:
+            key = f'ratelimit:{url_name}:{client_id(request)}'
+            wait = take_token(key, limit['rate'], limit['burst'])
+            if wait:
+                return too_busy(429, wait, 'Too many requests, please slow down.')
+        return self.get_response(request)
@@ -0,0 +1,24 @@
+from django.urls import Resolver404, get_resolver
+
+
+def resolve_request(request):
+    """Resolve the request path once and cache the match on the request.
+
+    Middleware that needs to know which view a request is headed for (before
+    Django's own URL resolution runs) shares this helper so the URLconf is only
+    walked once per request. Returns ``None`` for paths that don't resolve.
+    """
+    if not hasattr(request, '_movie_resolver_match'):
+        resolver = get_resolver(getattr(request, 'urlconf', None))
+        try:
+            match = resolver.resolve(request.path_info)
+        except Resolver404:
+            match = None
+        request._movie_resolver_match = match
+    return request._movie_resolver_match
+
+
+def resolve_url_name(request):
+    """Return the URL name the request resolves to, or ``None``."""
+    match = resolve_request(request)
+    return match.url_name if match else None
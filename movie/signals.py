@@ -0,0 +1,68 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .edgecache import dispatcher, purge_keys_for
+from .events import broadcaster
+from .models import Movie, MovieEvent
+
+CATALOG_VERSION_KEY = 'catalog-version'
+
+
+def catalog_version():
+    """Return the current catalog version used to key cached pages.
+
+    A missing key (first use, eviction, restart) is seeded from the clock so
+    the version never goes backwards onto pages cached under an old value.
+    """
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(CATALOG_VERSION_KEY, 0)
+    return version
+
+
+def bump_catalog_version():
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        catalog_version()
+
+
+@receiver([post_save, post_delete], sender=Movie)
+def movie_changed(sender, instance, **kwargs):
+    # Bump now so the saving request sees fresh pages, and again on commit so
+    # a page rendered elsewhere from pre-commit data isn't kept.
+    bump_catalog_version()
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=Movie)
+def record_movie_saved(sender, instance, created, **kwargs):
+    MovieEvent.objects.create(
+        action=MovieEvent.CREATE if created else MovieEvent.UPDATE,
+        movie_id=instance.pk,
+        data={
+            'id': instance.pk,
+            'name': instance.name,
+            'genre': instance.genre,
+            'updated': instance.updated.isoformat(),
+        },
+    )
+    transaction.on_commit(broadcaster.notify)
+
+
+@receiver(post_delete, sender=Movie)
+def record_movie_deleted(sender, instance, **kwargs):
+    MovieEvent.objects.create(
+        action=MovieEvent.DELETE, movie_id=instance.pk, data={'id': instance.pk})
+    transaction.on_commit(broadcaster.notify)
+
+
+@receiver([post_save, post_delete], sender=Movie)
+def purge_edge_cache(sender, instance, **kwargs):
+    keys = purge_keys_for(instance)
+    transaction.on_commit(lambda: dispatcher.purge_edit(keys))
@@ -0,0 +1,162 @@
+"""
+Slow-query log.
+
+``SlowQueryMiddleware`` wraps every database execute during a request. Queries
+slower than ``SLOW_QUERY_THRESHOLD_MS`` are logged with the view they ran in,
+a fingerprint of their normalized SQL and their parameters, and aggregated into
+``SlowQuery`` rows once the response has been sent. A ``SLOW_QUERY_EXPLAIN_RATE``
+share of slow SELECTs is also run through ``EXPLAIN`` (``EXPLAIN ANALYZE`` with
+``SLOW_QUERY_EXPLAIN_ANALYZE`` on backends that support it). ``manage.py
+slow_queries`` lists the worst fingerprints.
+"""
+
+import hashlib
+import logging
+import random
+import re
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import SlowQuery
+from .routing import resolve_request
+
+logger = logging.getLogger(__name__)
+
+LITERALS = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+]
+
+
+def normalize(sql):
+    """Replace literals and placeholders so similar queries read the same."""
+    for pattern, replacement in LITERALS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()
+
+
+def format_params(params, many):
+    if many:
+        return f'<{len(params)} parameter sets>'
+    return repr(tuple(params or ()))[:1000]
+
+
+def explain(connection, sql, params):
+    """Return the backend's plan for ``sql``, or an empty string."""
+    analyze = settings.SLOW_QUERY_EXPLAIN_ANALYZE
+    try:
+        prefix = connection.ops.explain_query_prefix(analyze=True) if analyze else None
+    except ValueError:
+        # The backend has no ANALYZE option (e.g. SQLite).
+        prefix = None
+    try:
+        prefix = prefix or connection.ops.explain_query_prefix()
+        # A savepoint, so a failed EXPLAIN can't abort an outer transaction.
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}', params)
+            rows = cursor.fetchall()
+    except DatabaseError:
+        logger.debug('Could not EXPLAIN %s', sql, exc_info=True)
+        return ''
+    return '\n'.join(' '.join(str(column) for column in row) for row in rows)
+
+
+class QueryTimer:
+    """``execute_wrapper`` collecting the queries slower than the threshold."""
+
+    def __init__(self, threshold_ms):
+        self.threshold_ms = threshold_ms
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if elapsed_ms >= self.threshold_ms:
+                self.slow.append(
+                    (context['connection'].alias, sql, params, many, elapsed_ms))
+
+
+def record(view, slow):
+    """Log ``slow`` queries and add them to the ``SlowQuery`` aggregates."""
+    for alias, sql, params, many, elapsed_ms in slow:
+        normalized = normalize(sql)
+        key = fingerprint(normalized)
+        logger.warning('Slow query (%.0fms) in %s [%s]: %s params=%s',
+                       elapsed_ms, view or '-', key[:12], sql, format_params(params, many))
+
+        plan = ''
+        if (not many and normalized.upper().startswith('SELECT')
+                and random.random() < settings.SLOW_QUERY_EXPLAIN_RATE):
+            plan = explain(connections[alias], sql, params)
+
+        try:
+            entry, _ = SlowQuery.objects.get_or_create(
+                fingerprint=key, view=view, defaults={'sql': normalized})
+        except IntegrityError:
+            # Another worker created it first.
+            entry = SlowQuery.objects.get(fingerprint=key, view=view)
+        updates = {
+            'count': F('count') + 1,
+            'total_ms': F('total_ms') + elapsed_ms,
+            'max_ms': Greatest(F('max_ms'), elapsed_ms),
+            'last_params': format_params(params, many),
+            'last_seen': timezone.now(),
+        }
+        if plan:
+            updates['explain'] = plan
+        SlowQuery.objects.filter(pk=entry.pk).update(**updates)
+
+
+def record_safely(view, slow):
+    try:
+        record(view, slow)
+    except DatabaseError:
+        logger.exception('Could not record slow queries for %s', view)
+
+
+class SlowQueryMiddleware:
+    """Time every query of a request and record the slow ones after the response."""
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_LOG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer(settings.SLOW_QUERY_THRESHOLD_MS)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        if timer.slow:
+            match = resolve_request(request)
+            view = match.view_name if match else ''
+            # The server calls close() once it has sent the response, so the
+            # EXPLAIN and the writes don't delay the client. Record before the
+            # original close() fires request_finished and releases connections.
+            close = response.close
+
+            def record_and_close():
+                try:
+                    record_safely(view, timer.slow)
+                finally:
+                    close()
+            response.close = record_and_close
+        return response
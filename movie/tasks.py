@@ -0,0 +1,103 @@
+"""
+Background tasks run by the job queue (see movie/jobs.py).
+"""
+
+import json
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from .cards import render_movie_cards
+from .jobs import task
+from .models import Movie
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 100
+WARM_BATCH_SIZE = 200
+
+SAMPLE_MOVIES = [
+    {
+        'name': 'The Shawshank Redemption',
+        'genre': 'Drama',
+        'description': 'A man wrongfully imprisoned finds hope and redemption through the common decency of the men serving time with him.'
+    },
+    {
+        'name': 'The Godfather',
+        'genre': 'Crime',
+        'description': 'The aging patriarch of an organized crime dynasty transfers control to his reluctant son.'
+    },
+    {
+        'name': 'Inception',
+        'genre': 'Sci-Fi',
+        'description': 'A thief who steals secrets from dreams is given the final job of planting an idea deep within a target\'s subconscious.'
+    },
+    {
+        'name': 'The Dark Knight',
+        'genre': 'Action',
+        'description': 'Batman faces his greatest challenge yet as the Joker wreaks havoc and chaos on Gotham City.'
+    },
+    {
+        'name': 'Forrest Gump',
+        'genre': 'Drama',
+        'description': 'A man with a low IQ accomplishes great things in his life and influences the lives of those around him.'
+    }
+]
+
+
+@task('import_movies')
+def import_movies(context, movies=None, path=None, replace=False, start=0):
+    """Create movies from ``movies`` (a list of dicts), a JSON file at
+    ``path``, or the sample data.
+
+    Rows are saved one by one so the usual signals fire, in batched
+    transactions so progress is visible while a large import runs. Each batch
+    commits together with a checkpoint of the next row to import, so a retry
+    resumes after the last committed batch instead of importing it twice.
+    """
+    if path:
+        with open(path) as f:
+            movies = json.load(f)
+    elif movies is None:
+        movies = SAMPLE_MOVIES
+
+    if replace and not start:
+        Movie.objects.all().delete()
+
+    for offset in range(start, len(movies), IMPORT_BATCH_SIZE):
+        batch = movies[offset:offset + IMPORT_BATCH_SIZE]
+        done = offset + len(batch)
+        with transaction.atomic():
+            for movie_data in batch:
+                Movie.objects.create(**movie_data)
+            context.checkpoint(start=done)
+        context.progress(done, len(movies), f'Imported {done} of {len(movies)} movies')
+
+
+@task('warm_card_cache')
+def warm_card_cache(context):
+    """Render and cache the card of every movie.
+
+    Skipped unless the cache is shared: cards rendered into a worker's
+    private cache would never be seen by the web processes.
+    """
+    if not settings.CACHE_IS_SHARED:
+        logger.warning('Skipping warm_card_cache: %s is private to each process; '
+                       'set a shared CACHE_BACKEND to warm cards from run_jobs',
+                       settings.CACHE_BACKEND)
+        context.progress(0, 0, 'Skipped: the cache is not shared')
+        return
+    total = Movie.objects.count()
+    batch, done = [], 0
+    movies = Movie.objects.for_listing().order_by('id')
+    for movie in movies.iterator(chunk_size=WARM_BATCH_SIZE):
+        batch.append(movie)
+        if len(batch) == WARM_BATCH_SIZE:
+            render_movie_cards(batch)
+            done += len(batch)
+            batch = []
+            context.progress(done, total, f'Rendered {done} of {total} cards')
+    if batch:
+        render_movie_cards(batch)
+    context.progress(total, total, f'Rendered {total} cards')
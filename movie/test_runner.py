@@ -0,0 +1,80 @@
+"""
+Test runner that reports the slowest tests.
+
+Durations are measured around each test (setUp and tearDown included), both
+in a serial run and inside ``--parallel`` workers, whose timings are sent
+back to the main process along with the other result events.
+"""
+
+import time
+import unittest
+
+from django.test.runner import (
+    DiscoverRunner, ParallelTestSuite, RemoteTestResult, RemoteTestRunner,
+)
+
+
+class TimedTextTestResult(unittest.TextTestResult):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.test_durations = {}
+
+    def startTest(self, test):
+        self.started = time.perf_counter()
+        super().startTest(test)
+
+    def addTestDuration(self, test, elapsed):
+        self.test_durations[test.id()] = elapsed
+
+    def stopTest(self, test):
+        # Tests run in a parallel worker already reported their own duration.
+        self.test_durations.setdefault(test.id(), time.perf_counter() - self.started)
+        super().stopTest(test)
+
+
+class TimedRemoteTestResult(RemoteTestResult):
+    def startTest(self, test):
+        self.started = time.perf_counter()
+        super().startTest(test)
+
+    def stopTest(self, test):
+        self.events.append(
+            ('addTestDuration', self.test_index, time.perf_counter() - self.started))
+        super().stopTest(test)
+
+
+class TimedRemoteTestRunner(RemoteTestRunner):
+    resultclass = TimedRemoteTestResult
+
+
+class TimedParallelTestSuite(ParallelTestSuite):
+    runner_class = TimedRemoteTestRunner
+
+
+class TimedTestRunner(DiscoverRunner):
+    parallel_test_suite = TimedParallelTestSuite
+
+    def __init__(self, slowest=10, **kwargs):
+        super().__init__(**kwargs)
+        self.slowest = slowest
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--slowest', type=int, default=10,
+            help='Number of slowest tests to list after the run (default: 10, 0 to disable)')
+
+    def get_resultclass(self):
+        return super().get_resultclass() or TimedTextTestResult
+
+    def run_suite(self, suite, **kwargs):
+        result = super().run_suite(suite, **kwargs)
+        durations = getattr(result, 'test_durations', {})
+        if self.slowest and durations:
+            slowest = sorted(durations.items(), key=lambda item: -item[1])[:self.slowest]
+            self.log(f'\nSlowest {len(slowest)} of {len(durations)} tests '
+                     f'({sum(durations.values()):.2f}s in total):')
+            for test_id, elapsed in slowest:
+                self.log(f'  {elapsed:6.3f}s  {test_id}')
+        return result
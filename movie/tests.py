@@ -3,12 +3,35 @@ Django MovieApp Test Suite
 Tests for Django Setup, Templates/Views, Models, and Forms
 """
 
-from django.test import TestCase, Client
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from asgiref.testing import ApplicationCommunicator
 from django.urls import reverse
 from django.contrib.auth.models import User
 from django.conf import settings
+from django.core.management import call_command
+from django.core.cache import cache
+from django.db import OperationalError, connection
+from django.http import QueryDict
+from django.utils import timezone
+from unittest import mock, skipUnless
+import asyncio
+import datetime
+import gzip
+import http.server
+import threading
+import time
 import os
-from .models import Movie
+from io import StringIO
+from . import compression, edgecache, jobs, ratelimit, slowqueries, warmup
+from .budgets import BUDGETS, ViewBudgetTestMixin, seed_movies, url_names
+from .cards import CARD_TEMPLATE, card_cache_key, card_template_version
+from .compression import preferred_encoding
+from .events import Subscription, broadcaster, latest_event_id
+from .forms import MovieFilterForm
+from .management.commands.benchmark import persistent_connections
+from .models import Job, Movie, MovieEvent, SlowQuery
+from movieapp_lab9.asgi import application as asgi_application
 
 
 class DjangoSetupTestCase(TestCase):
@@ -48,9 +71,10 @@ class DjangoSetupTestCase(TestCase):
 class MovieModelTestCase(TestCase):
     """Test Django Models"""
     
-    def setUp(self):
-        """Set up test data"""
-        self.movie = Movie.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data once for the class"""
+        cls.movie = Movie.objects.create(
             name="Test Movie",
             genre="Drama",
             description="A test movie for testing purposes"
@@ -96,15 +120,15 @@ class MovieModelTestCase(TestCase):
 class MovieViewsTestCase(TestCase):
     """Test Templates and Views"""
     
-    def setUp(self):
-        """Set up test data and client"""
-        self.client = Client()
-        self.movie1 = Movie.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data once for the class"""
+        cls.movie1 = Movie.objects.create(
             name="The Shawshank Redemption",
             genre="Drama",
             description="Two imprisoned men bond over a number of years"
         )
-        self.movie2 = Movie.objects.create(
+        cls.movie2 = Movie.objects.create(
             name="Inception",
             genre="Sci-Fi",
             description="A thief who steals corporate secrets"
@@ -157,10 +181,10 @@ class MovieViewsTestCase(TestCase):
 class TemplateTestCase(TestCase):
     """Test Template Structure and Content"""
     
-    def setUp(self):
-        """Set up test data"""
-        self.client = Client()
-        self.movie = Movie.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data once for the class"""
+        cls.movie = Movie.objects.create(
             name="Test Movie",
             genre="Test Genre",
             description="Test Description"
@@ -266,11 +290,11 @@ class FormTestCase(TestCase):
 class IntegrationTestCase(TestCase):
     """Integration Tests - Testing Full User Workflows"""
     
-    def setUp(self):
-        """Set up comprehensive test data"""
-        self.client = Client()
+    @classmethod
+    def setUpTestData(cls):
+        """Set up comprehensive test data once for the class"""
         # Create multiple movies for testing
-        self.movies = [
+        cls.movies = [
             Movie.objects.create(name="The Matrix", genre="Sci-Fi", description="Reality simulation"),
             Movie.objects.create(name="Titanic", genre="Romance", description="Ship disaster"),
             Movie.objects.create(name="Jaws", genre="Thriller", description="Shark attack"),
@@ -319,3 +343,857 @@ class PerformanceTestCase(TestCase):
         # Ensure all movies are displayed
         self.assertContains(response, "Movie 0")
         self.assertContains(response, "Movie 9")
+
+
+class MovieExcerptTestCase(TestCase):
+    """Test the stored excerpt that keeps descriptions out of listings"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data once for the class"""
+        cls.movie = Movie.objects.create(
+            name="Long Movie", genre="Drama",
+            description="word " * 500 + "ENDING")
+    
+    def setUp(self):
+        """Start every test with an empty cache"""
+        cache.clear()
+    
+    def test_excerpt_stored_on_save(self):
+        """Test the excerpt is the first 15 words and follows edits"""
+        self.assertEqual(self.movie.excerpt, "word " * 14 + "word …")
+        self.movie.description = "Short and sweet"
+        self.movie.save(update_fields=['description'])
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.excerpt, "Short and sweet")
+    
+    def test_listings_skip_description(self):
+        """Test list and search queries leave the description column out"""
+        for url, params in [(reverse('movie_list'), {}), (reverse('movie_search'), {'genre': 'Drama'})]:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, params)
+            self.assertContains(response, "word word")
+            self.assertNotContains(response, "ENDING")
+            self.assertTrue(queries.captured_queries)
+            for query in queries.captured_queries:
+                self.assertNotIn('"description"', query['sql'])
+    
+    def test_detail_shows_full_description(self):
+        """Test the detail page still loads the full text"""
+        response = self.client.get(reverse('movie_detail', kwargs={'id': self.movie.id}))
+        self.assertContains(response, "ENDING")
+
+
+class ViewBudgetTestCase(ViewBudgetTestMixin, TestCase):
+    """Test every view stays within its query, row and time budget"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Seed the catalog the budgets are measured against"""
+        seed_movies()
+    
+    def test_every_view_has_a_budget(self):
+        """Test each URL in movie/urls.py declares a budget"""
+        self.assertEqual(sorted(url_names()), sorted(BUDGETS))
+    
+    def test_views_within_budget(self):
+        """Test each view against its budget with empty caches"""
+        for url_name in url_names():
+            with self.subTest(url_name=url_name):
+                self.assertWithinBudget(url_name)
+    
+    def test_over_budget_lists_queries(self):
+        """Test a budget failure names the limit and the offending SQL"""
+        with mock.patch.dict(BUDGETS, {'movie_list': {
+                'max_queries': 0, 'max_rows': 0, 'max_render_ms': 1000}}):
+            with self.assertRaises(AssertionError) as failure:
+                self.assertWithinBudget('movie_list')
+        message = str(failure.exception)
+        self.assertIn('1 queries (max 0)', message)
+        self.assertIn('100 rows fetched (max 0)', message)
+        self.assertIn('FROM "movie_movie"', message)
+
+
+class FastPathTestCase(TestCase):
+    """Test the anonymous read-only fast path for public pages"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data once for the class"""
+        cls.movie = Movie.objects.create(name="Fast Movie", genre="Drama")
+    
+    def setUp(self):
+        """Start every test with an empty cache"""
+        cache.clear()
+    
+    def test_public_pages_use_fast_path(self):
+        """Test public catalog pages skip the session/auth middleware"""
+        for url in [reverse('home'), reverse('movie_list'),
+                    reverse('movie_detail', kwargs={'id': self.movie.id}),
+                    reverse('movie_search')]:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.wsgi_request.fast_path)
+            self.assertFalse(hasattr(response.wsgi_request, 'user'))
+            self.assertNotIn('user', response.context)
+    
+    def test_fast_path_404(self):
+        """Test missing movies still return 404 through the fast path"""
+        response = self.client.get(reverse('movie_detail', kwargs={'id': 9999}))
+        self.assertEqual(response.status_code, 404)
+    
+    def test_admin_uses_full_stack(self):
+        """Test the admin keeps sessions, auth and CSRF"""
+        response = self.client.get('/admin/login/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(getattr(response.wsgi_request, 'fast_path', False))
+        self.assertTrue(hasattr(response.wsgi_request, 'user'))
+        self.assertIn('csrftoken', response.cookies)
+    
+    @override_settings(PUBLIC_FAST_PATH=False)
+    def test_fast_path_can_be_disabled(self):
+        """Test PUBLIC_FAST_PATH=False restores the full middleware stack"""
+        response = self.client.get(reverse('movie_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(getattr(response.wsgi_request, 'fast_path', False))
+        self.assertIn('user', response.context)
+
+
+class MovieCardCacheTestCase(TestCase):
+    """Test cached movie card fragments shared by list and search"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data once for the class"""
+        cls.movie = Movie.objects.create(
+            name="Cached Movie",
+            genre="Drama",
+            description="A movie whose card should be rendered only once"
+        )
+    
+    def setUp(self):
+        """Start every test with an empty cache"""
+        cache.clear()
+    
+    def test_card_cached_after_list(self):
+        """Test the list page stores the rendered card"""
+        self.client.get(reverse('movie_list'))
+        self.assertIsNotNone(cache.get(card_cache_key(self.movie)))
+    
+    def test_search_reuses_list_cards(self):
+        """Test the search page reuses cards rendered for the list page"""
+        response = self.client.get(reverse('movie_list'))
+        self.assertTemplateUsed(response, CARD_TEMPLATE)
+        response = self.client.get(reverse('movie_search'), {'genre': 'Drama'})
+        self.assertContains(response, "Cached Movie")
+        self.assertTemplateNotUsed(response, CARD_TEMPLATE)
+    
+    def test_edited_movie_rerenders_card(self):
+        """Test saving a movie invalidates its cached card"""
+        self.client.get(reverse('movie_list'))
+        self.movie.name = "Renamed Movie"
+        self.movie.save()
+        response = self.client.get(reverse('movie_list'))
+        self.assertContains(response, "Renamed Movie")
+        self.assertNotContains(response, "Cached Movie")
+    
+    def test_template_change_rerenders_card(self):
+        """Test cards cached before a card template change aren't reused after it"""
+        key = card_cache_key(self.movie)
+        template = mock.Mock()
+        template.template.source = '<div>{{ movie.name }} (new layout)</div>'
+        card_template_version.cache_clear()
+        self.addCleanup(card_template_version.cache_clear)
+        with mock.patch('movie.cards.get_template', return_value=template):
+            self.assertNotEqual(card_cache_key(self.movie), key)
+
+
+class CompressedPageTestCase(TestCase):
+    """Test compressed and cached public pages"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data once for the class"""
+        for i in range(5):
+            Movie.objects.create(name=f"Compressed Movie {i}", genre="Drama",
+                                 description="Long enough to compress " * 10)
+    
+    def setUp(self):
+        """Start every test with an empty cache"""
+        cache.clear()
+    
+    def test_gzip_response(self):
+        """Test public pages are gzip-compressed for gzip clients"""
+        with mock.patch('movie.compression.brotli', None):
+            response = self.client.get(reverse('movie_list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn(b'Compressed Movie 4', gzip.decompress(response.content))
+    
+    @skipUnless(compression.brotli, "brotli is not installed")
+    def test_brotli_response(self):
+        """Test brotli is preferred when installed and accepted"""
+        response = self.client.get(reverse('movie_list'), HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertIn(b'Compressed Movie 4', compression.brotli.decompress(response.content))
+    
+    def test_preferred_encoding(self):
+        """Test Accept-Encoding negotiation"""
+        self.assertEqual(preferred_encoding('gzip, deflate'), 'gzip')
+        self.assertIsNone(preferred_encoding('gzip;q=0, identity'))
+        self.assertIsNone(preferred_encoding(''))
+        with mock.patch('movie.compression.brotli', None):
+            self.assertEqual(preferred_encoding('br, gzip'), 'gzip')
+    
+    def test_uncompressed_without_accept_encoding(self):
+        """Test clients that don't accept compression get plain HTML"""
+        response = self.client.get(reverse('movie_list'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertContains(response, "Compressed Movie 0")
+    
+    @override_settings(COMPRESSION_MIN_SIZE=10 ** 7)
+    def test_small_responses_not_compressed(self):
+        """Test bodies under COMPRESSION_MIN_SIZE are sent as-is"""
+        response = self.client.get(reverse('movie_list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+    
+    def test_cache_hit_serves_compressed_bytes(self):
+        """Test a cached page is served without running the view again"""
+        first = self.client.get(reverse('movie_list'), HTTP_ACCEPT_ENCODING='gzip')
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse('movie_list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(second['Content-Encoding'], first['Content-Encoding'])
+    
+    def test_saving_movie_invalidates_cached_pages(self):
+        """Test catalog changes are visible immediately"""
+        self.client.get(reverse('movie_list'))
+        Movie.objects.create(name="Brand New Movie", genre="Drama")
+        response = self.client.get(reverse('movie_list'))
+        self.assertContains(response, "Brand New Movie")
+    
+    def test_admin_not_compressed(self):
+        """Test admin pages are never compressed"""
+        response = self.client.get('/admin/login/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+
+class MovieSortFilterTestCase(TestCase):
+    """Test sorting and date range filtering on list and search"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Set up movies with known update times once for the class"""
+        cls.old = Movie.objects.create(name="Alien", genre="Sci-Fi")
+        cls.mid = Movie.objects.create(name="Casablanca", genre="Drama")
+        cls.new = Movie.objects.create(name="Blade Runner", genre="Sci-Fi")
+        for movie, day in [(cls.old, 1), (cls.mid, 10), (cls.new, 20)]:
+            Movie.objects.filter(pk=movie.pk).update(
+                updated=datetime.datetime(2025, 1, day, 12, tzinfo=datetime.timezone.utc))
+    
+    def setUp(self):
+        """Start every test with an empty cache"""
+        cache.clear()
+    
+    def names(self, response):
+        return [movie.name for movie in response.context['movies']]
+    
+    def test_default_sort_by_name(self):
+        """Test the list is sorted by name by default"""
+        response = self.client.get(reverse('movie_list'))
+        self.assertEqual(self.names(response), ["Alien", "Blade Runner", "Casablanca"])
+    
+    def test_sort_recently_updated(self):
+        """Test sorting by most recently updated"""
+        response = self.client.get(reverse('movie_list'), {'sort': '-updated'})
+        self.assertEqual(self.names(response), ["Blade Runner", "Casablanca", "Alien"])
+    
+    def test_updated_range_filter(self):
+        """Test both ends of the update date range are inclusive"""
+        response = self.client.get(reverse('movie_list'), {
+            'updated_after': '2025-01-10', 'updated_before': '2025-01-20'})
+        self.assertEqual(self.names(response), ["Blade Runner", "Casablanca"])
+    
+    def test_list_genre_filter_is_exact(self):
+        """Test the list page genre filter matches whole genres"""
+        response = self.client.get(reverse('movie_list'), {'genre': 'Sci-Fi'})
+        self.assertEqual(self.names(response), ["Alien", "Blade Runner"])
+        response = self.client.get(reverse('movie_list'), {'genre': 'Sci'})
+        self.assertEqual(self.names(response), [])
+    
+    def test_invalid_options_ignored(self):
+        """Test bad sort or date values fall back to defaults"""
+        response = self.client.get(reverse('movie_list'), {
+            'sort': 'description', 'updated_after': 'not-a-date'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.names(response), ["Alien", "Blade Runner", "Casablanca"])
+    
+    def test_updated_before_last_day(self):
+        """Test the largest possible end date keeps every movie"""
+        response = self.client.get(reverse('movie_list'), {'updated_before': '9999-12-31'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.names(response), ["Alien", "Blade Runner", "Casablanca"])
+    
+    def test_search_sort_and_filter(self):
+        """Test search accepts the same sort and filter options"""
+        response = self.client.get(reverse('movie_search'), {
+            'genre': 'sci', 'sort': '-name', 'updated_after': '2025-01-01'})
+        self.assertEqual(self.names(response), ["Blade Runner", "Alien"])
+    
+    def test_search_invalid_genre_finds_nothing(self):
+        """Test a genre too long for the form doesn't return the whole catalog"""
+        response = self.client.get(reverse('movie_search'), {'genre': 'x' * 201})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.names(response), [])
+
+
+@skipUnless(connection.vendor == 'sqlite', "Query plans checked against SQLite")
+class MovieIndexPlanTestCase(TestCase):
+    """Test the planner uses the composite indexes instead of sorting"""
+    
+    def plan(self, params, genre_lookup='exact'):
+        queryset = MovieFilterForm(QueryDict(params)).filter_queryset(
+            Movie.objects.all(), genre_lookup=genre_lookup)
+        return queryset.explain()
+    
+    def assertUsesIndex(self, plan, index):
+        self.assertIn(f'USING INDEX {index}', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+    
+    def test_sort_by_name_uses_name_index(self):
+        """Test name ordering walks (name, id)"""
+        self.assertUsesIndex(self.plan('sort=name'), 'movie_name_id_idx')
+    
+    def test_genre_by_recent_uses_genre_index(self):
+        """Test a genre listing by update time walks (genre, updated)"""
+        self.assertUsesIndex(self.plan('genre=Drama&sort=-updated'), 'movie_genre_updated_idx')
+    
+    def test_updated_range_uses_updated_index(self):
+        """Test an update date range is an index range scan"""
+        plan = self.plan('updated_after=2025-01-01&sort=-updated')
+        self.assertUsesIndex(plan, 'movie_updated_id_idx')
+        self.assertIn('SEARCH', plan)
+    
+    def test_search_sorted_by_name_avoids_sort(self):
+        """Test substring search results come back in index order"""
+        self.assertUsesIndex(self.plan('genre=dra&sort=name', 'icontains'), 'movie_name_id_idx')
+
+
+@jobs.task('tests.flaky')
+def flaky_task(context, failures=0):
+    """Test task that fails the first ``failures`` attempts"""
+    if context.job.attempts <= failures:
+        raise RuntimeError("flaky task failed")
+    context.progress(1, 2, "halfway")
+
+
+class JobQueueTestCase(TestCase):
+    """Test the DB-backed background job queue"""
+    
+    def setUp(self):
+        """Set up a worker"""
+        self.worker = jobs.Worker()
+    
+    def test_enqueue_unknown_task(self):
+        """Test queueing an unregistered task fails fast"""
+        with self.assertRaises(ValueError):
+            jobs.enqueue('no.such.task')
+    
+    def test_import_movies_job(self):
+        """Test the import task runs and reports progress"""
+        job = jobs.enqueue('import_movies', movies=[
+            {'name': "Queued Movie", 'genre': "Drama", 'description': "Imported later"},
+        ])
+        self.assertEqual(self.worker.run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.progress, 100)
+        self.assertEqual(job.progress_message, "Imported 1 of 1 movies")
+        self.assertTrue(Movie.objects.filter(name="Queued Movie").exists())
+    
+    @override_settings(JOB_RETRY_DELAY=0)
+    def test_import_movies_retry_resumes(self):
+        """Test a retried import doesn't repeat the batches already committed"""
+        job = jobs.enqueue('import_movies', movies=[
+            {'name': "First Import", 'genre': "Drama"},
+            {'title': "Bad Row"},
+        ])
+        with mock.patch('movie.tasks.IMPORT_BATCH_SIZE', 1), \
+                self.assertLogs('movie.jobs', 'WARNING'):
+            self.worker.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 3)
+        self.assertEqual(job.payload['start'], 1)
+        self.assertEqual(Movie.objects.filter(name="First Import").count(), 1)
+    
+    def test_job_claimed_once(self):
+        """Test a claimed job can't be claimed by another worker"""
+        job = jobs.enqueue('tests.flaky')
+        self.assertEqual(jobs.claim_next('worker-a').pk, job.pk)
+        self.assertIsNone(jobs.claim_next('worker-b'))
+    
+    def test_delayed_job_not_due(self):
+        """Test jobs wait for run_after"""
+        jobs.enqueue('tests.flaky', delay=3600)
+        self.assertEqual(self.worker.run_pending(), 0)
+    
+    @override_settings(JOB_RETRY_DELAY=0)
+    def test_failed_job_retried(self):
+        """Test a failing job is retried until it succeeds"""
+        job = jobs.enqueue('tests.flaky', failures=2)
+        with self.assertLogs('movie.jobs', 'WARNING'):
+            self.worker.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.attempts, 3)
+    
+    @override_settings(JOB_RETRY_DELAY=0)
+    def test_job_fails_after_max_attempts(self):
+        """Test a job that keeps failing is marked failed with its error"""
+        job = jobs.enqueue('tests.flaky', max_attempts=2, failures=5)
+        with self.assertLogs('movie.jobs', 'ERROR'):
+            self.worker.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertIn("flaky task failed", job.last_error)
+    
+    def test_run_jobs_prunes_old_events(self):
+        """Test run_jobs prunes the change log with no SSE clients connected"""
+        old = MovieEvent.objects.create(action='create', movie_id=1)
+        recent = MovieEvent.objects.create(action='create', movie_id=2)
+        MovieEvent.objects.filter(pk=old.pk).update(
+            created=timezone.now() - datetime.timedelta(seconds=settings.SSE_EVENT_RETENTION + 60))
+        call_command('run_jobs', once=True, stdout=StringIO())
+        self.assertFalse(MovieEvent.objects.filter(pk=old.pk).exists())
+        self.assertTrue(MovieEvent.objects.filter(pk=recent.pk).exists())
+    
+    @override_settings(CACHE_IS_SHARED=True)
+    def test_warm_card_cache_job(self):
+        """Test the cache warming task renders every card"""
+        cache.clear()
+        movie = Movie.objects.create(name="Warm Movie", genre="Drama")
+        jobs.enqueue('warm_card_cache')
+        self.worker.run_pending()
+        self.assertIsNotNone(cache.get(card_cache_key(movie)))
+    
+    @override_settings(CACHE_IS_SHARED=False)
+    def test_warm_card_cache_needs_shared_cache(self):
+        """Test cache warming is skipped when the workers can't see the cache"""
+        cache.clear()
+        movie = Movie.objects.create(name="Cold Movie", genre="Drama")
+        job = jobs.enqueue('warm_card_cache')
+        with self.assertLogs('movie.tasks', 'WARNING'):
+            self.worker.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertIsNone(cache.get(card_cache_key(movie)))
+
+
+class MovieEventStreamTestCase(TestCase):
+    """Test the Server-Sent Events feed on the ASGI application"""
+    
+    def scope(self, last_event_id=None):
+        headers = []
+        if last_event_id is not None:
+            headers.append((b'last-event-id', str(last_event_id).encode()))
+        return {'type': 'http', 'method': 'GET', 'path': settings.SSE_EVENTS_PATH,
+                'query_string': b'', 'headers': headers}
+    
+    async def connect(self, last_event_id=None):
+        communicator = ApplicationCommunicator(asgi_application, self.scope(last_event_id))
+        await communicator.send_input({'type': 'http.request'})
+        start = await communicator.receive_output(timeout=2)
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-type', b'text/event-stream'), start['headers'])
+        retry = await communicator.receive_output(timeout=2)
+        self.assertTrue(retry['body'].startswith(b'retry:'))
+        return communicator
+    
+    async def disconnect(self, communicator):
+        await communicator.send_input({'type': 'http.disconnect'})
+        await communicator.wait(timeout=2)
+    
+    def test_changes_recorded(self):
+        """Test create, update and delete each add a change-log event"""
+        movie = Movie.objects.create(name="Logged Movie", genre="Drama")
+        movie.save()
+        movie_id = movie.id
+        movie.delete()
+        actions = list(MovieEvent.objects.filter(movie_id=movie_id)
+                       .order_by('id').values_list('action', flat=True))
+        self.assertEqual(actions, ['create', 'update', 'delete'])
+    
+    async def test_resume_with_last_event_id(self):
+        """Test a reconnecting client receives the events it missed"""
+        await Movie.objects.acreate(name="Missed Movie", genre="Drama")
+        event = await MovieEvent.objects.order_by('-id').afirst()
+        communicator = await self.connect(last_event_id=event.id - 1)
+        chunk = await communicator.receive_output(timeout=2)
+        self.assertIn(f'id: {event.id}'.encode(), chunk['body'])
+        self.assertIn(b'event: movie.create', chunk['body'])
+        self.assertIn(b'Missed Movie', chunk['body'])
+        await self.disconnect(communicator)
+    
+    @override_settings(SSE_BACKLOG_LIMIT=2)
+    async def test_resume_pages_through_backlog(self):
+        """Test a client that missed more than one page of events gets them all"""
+        for i in range(5):
+            await Movie.objects.acreate(name=f"Missed Movie {i}", genre="Drama")
+        ids = [event_id async for event_id in
+               MovieEvent.objects.order_by('id').values_list('id', flat=True)]
+        communicator = await self.connect(last_event_id=ids[0] - 1)
+        for event_id in ids:
+            chunk = await communicator.receive_output(timeout=2)
+            self.assertIn(f'id: {event_id}\n'.encode(), chunk['body'])
+        await self.disconnect(communicator)
+    
+    @override_settings(SSE_POLL_INTERVAL=0.05)
+    async def test_live_events_fan_out(self):
+        """Test every subscriber receives a new event from the one poller"""
+        first = await self.connect()
+        second = await self.connect()
+        while broadcaster.last_id is None:
+            await asyncio.sleep(0.01)
+        await Movie.objects.acreate(name="Live Movie", genre="Drama")
+        for communicator in (first, second):
+            chunk = await communicator.receive_output(timeout=2)
+            self.assertIn(b'Live Movie', chunk['body'])
+        await self.disconnect(first)
+        await self.disconnect(second)
+        self.assertIsNone(broadcaster.poller)
+    
+    async def poll_ids(self, subscription):
+        """Run one poll and return the ids published to ``subscription``"""
+        await broadcaster.poll_once()
+        ids = []
+        while not subscription.queue.empty():
+            ids.append(subscription.queue.get_nowait().id)
+        return ids
+    
+    async def subscribe_without_poller(self):
+        """Subscribe directly, with the poller's cursor at the latest event"""
+        subscription = Subscription()
+        broadcaster.subscribers.add(subscription)
+        broadcaster.last_id = await latest_event_id()
+        
+        def reset():
+            broadcaster.subscribers.discard(subscription)
+            broadcaster.last_id = broadcaster.gap_since = None
+        self.addCleanup(reset)
+        return subscription
+    
+    async def test_late_commit_published_in_order(self):
+        """Test an event whose id becomes visible late is not skipped"""
+        subscription = await self.subscribe_without_poller()
+        base = broadcaster.last_id
+        await MovieEvent.objects.acreate(id=base + 2, action='create', movie_id=2)
+        self.assertEqual(await self.poll_ids(subscription), [])
+        await MovieEvent.objects.acreate(id=base + 1, action='create', movie_id=1)
+        self.assertEqual(await self.poll_ids(subscription), [base + 1, base + 2])
+    
+    @override_settings(SSE_GAP_TIMEOUT=0)
+    async def test_gap_given_up_after_timeout(self):
+        """Test a gap that never fills (a rolled-back insert) stops holding events back"""
+        subscription = await self.subscribe_without_poller()
+        base = broadcaster.last_id
+        await MovieEvent.objects.acreate(id=base + 2, action='create', movie_id=2)
+        self.assertEqual(await self.poll_ids(subscription), [base + 2])
+    
+    @override_settings(SSE_POLL_INTERVAL=0.01)
+    async def test_poller_survives_database_errors(self):
+        """Test a database error is logged and the poller keeps polling"""
+        calls = []
+        
+        async def flaky_latest_event_id():
+            calls.append(1)
+            if len(calls) == 1:
+                raise OperationalError("server closed the connection")
+            return await latest_event_id()
+        
+        with mock.patch('movie.events.latest_event_id', flaky_latest_event_id), \
+                self.assertLogs('movie.events', 'ERROR'):
+            subscription = broadcaster.subscribe()
+            self.addCleanup(broadcaster.unsubscribe, subscription)
+            await asyncio.wait_for(broadcaster.ready.wait(), 2)
+        self.assertFalse(broadcaster.poller.done())
+        self.assertEqual(len(calls), 2)
+    
+    @override_settings(SSE_POLL_INTERVAL=0.01, SSE_POLL_MAX_BACKOFF=0.01, SSE_HEARTBEAT=0.05)
+    async def test_resume_keeps_alive_while_poller_fails(self):
+        """Test a resuming client gets heartbeats while the poller can't start"""
+        async def failing_latest_event_id():
+            raise OperationalError("database is restarting")
+        
+        with mock.patch('movie.events.latest_event_id', failing_latest_event_id), \
+                self.assertLogs('movie.events', 'ERROR'):
+            communicator = await self.connect(last_event_id=1)
+            chunk = await communicator.receive_output(timeout=2)
+            self.assertEqual(chunk['body'], b': ping\n\n')
+            await self.disconnect(communicator)
+    
+    @override_settings(SSE_QUEUE_SIZE=1)
+    def test_slow_subscriber_dropped(self):
+        """Test a client that falls behind is dropped instead of buffering"""
+        subscription = Subscription()
+        broadcaster.subscribers.add(subscription)
+        broadcaster.publish(MovieEvent(id=1, action='create', movie_id=1))
+        broadcaster.publish(MovieEvent(id=2, action='create', movie_id=2))
+        self.assertTrue(subscription.overflowed)
+        self.assertNotIn(subscription, broadcaster.subscribers)
+
+
+class StartupWarmupTestCase(TestCase):
+    """Test the startup warmup and first-request timing"""
+    
+    def test_warm_up_fills_caches(self):
+        """Test warmup renders the public pages and closes DB connections"""
+        cache.clear()
+        movie = Movie.objects.create(name="Warm Start Movie", genre="Drama")
+        with persistent_connections(), self.assertLogs('movie.startup', 'INFO'), \
+                mock.patch.object(warmup, 'connections') as connections:
+            warmup.warm_up()
+        self.assertIsNotNone(cache.get(card_cache_key(movie)))
+        connections.close_all.assert_called_once()
+    
+    def test_warm_up_never_raises(self):
+        """Test a failing warmup step is logged instead of aborting startup"""
+        def warm_caches():
+            raise RuntimeError('cache unavailable')
+        
+        with mock.patch.object(warmup, 'connections'), \
+                mock.patch.object(warmup, 'warm_caches', warm_caches), \
+                self.assertLogs('movie.startup', 'ERROR') as logs:
+            warmup.warm_up()
+        self.assertIn('warm_caches', logs.output[0])
+    
+    def test_first_request_logged_once(self):
+        """Test only the first request's time since boot is logged"""
+        app = warmup.FirstRequestTimer(lambda environ, start_response: [b'ok'], 0.0)
+        with self.assertLogs('movie.startup', 'INFO') as logs:
+            self.assertEqual(app({}, None), [b'ok'])
+            app({}, None)
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('First request served', logs.output[0])
+
+
+class SlowQueryLogTestCase(TestCase):
+    """Test the slow-query log and its report"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data once for the class"""
+        Movie.objects.create(name="Slow Movie", genre="Drama")
+    
+    def setUp(self):
+        """Start every test with an empty cache"""
+        cache.clear()
+    
+    def test_fingerprint_ignores_literals(self):
+        """Test queries differing only in literals share a fingerprint"""
+        first = slowqueries.normalize("SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'a'")
+        second = slowqueries.normalize("SELECT *  FROM t WHERE id IN (%s, %s) AND name = 'it''s'")
+        self.assertEqual(first, second)
+        self.assertEqual(first, "SELECT * FROM t WHERE id IN (...) AND name = ?")
+    
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_EXPLAIN_RATE=1)
+    def test_slow_queries_recorded_per_view(self):
+        """Test slow queries are logged and aggregated with the view and plan"""
+        with self.assertLogs('movie.slowqueries', 'WARNING') as logs:
+            self.client.get(reverse('movie_search'), {'genre': 'Dra'})
+            self.client.get(reverse('movie_search'), {'genre': 'Dram'})
+        self.assertIn('movie_search', logs.output[0])
+        entry = SlowQuery.objects.get(view='movie_search', sql__contains='"movie_movie"')
+        self.assertEqual(entry.count, 2)
+        self.assertIn("'%Dram%'", entry.last_params)
+        self.assertIn('movie_movie', entry.explain)
+    
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=10_000)
+    def test_fast_queries_not_recorded(self):
+        """Test queries under the threshold leave no trace"""
+        self.client.get(reverse('movie_list'))
+        self.assertFalse(SlowQuery.objects.exists())
+    
+    def test_report_command(self):
+        """Test the report ranks recorded fingerprints"""
+        SlowQuery.objects.create(fingerprint='a' * 40, view='movie_list', sql='SELECT 1',
+                                 count=2, total_ms=30, max_ms=20)
+        SlowQuery.objects.create(fingerprint='b' * 40, view='movie_search', sql='SELECT 2',
+                                 count=1, total_ms=500, max_ms=500)
+        out = StringIO()
+        call_command('slow_queries', '--top', '1', stdout=out)
+        self.assertIn('movie_search', out.getvalue())
+        self.assertNotIn('movie_list', out.getvalue())
+
+
+class StandInProxy(http.server.ThreadingHTTPServer):
+    """Local stand-in for a caching proxy that records purge requests"""
+    
+    def __init__(self):
+        self.purges = []
+        proxy = self
+        
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_PURGE(self):
+                proxy.purges.append(self.headers['Surrogate-Key'].split())
+                self.send_response(200)
+                self.end_headers()
+            
+            def log_message(self, *args):
+                pass
+        
+        super().__init__(('127.0.0.1', 0), Handler)
+    
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/'
+
+
+class EdgeCacheTestCase(TestCase):
+    """Test Cache-Control policies, surrogate keys and purging"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data once for the class"""
+        cls.movie = Movie.objects.create(name="Edge Movie", genre="Sci-Fi")
+    
+    def setUp(self):
+        """Start every test with an empty cache"""
+        cache.clear()
+    
+    def test_public_pages_get_policy_headers(self):
+        """Test list pages are publicly cacheable with stale-while-revalidate"""
+        response = self.client.get(reverse('movie_list'))
+        cache_control = response['Cache-Control']
+        for directive in ['public', 'max-age=60', 's-maxage=86400', 'stale-while-revalidate=300']:
+            self.assertIn(directive, cache_control)
+        self.assertIn('Accept-Encoding', response['Vary'])
+    
+    def test_surrogate_keys(self):
+        """Test pages are tagged with the movies and genres they show"""
+        keys = self.client.get(reverse('movie_list'))['Surrogate-Key'].split()
+        self.assertEqual(keys, ['movies', f'movie-{self.movie.id}', 'genre-sci-fi'])
+        response = self.client.get(reverse('movie_detail', kwargs={'id': self.movie.id}))
+        self.assertEqual(response['Surrogate-Key'], f'movie-{self.movie.id} genre-sci-fi')
+    
+    def test_admin_not_publicly_cacheable(self):
+        """Test the admin never gets a public Cache-Control"""
+        response = self.client.get('/admin/login/')
+        self.assertNotIn('public', response.get('Cache-Control', ''))
+        self.assertFalse(response.has_header('Surrogate-Key'))
+    
+    def test_save_purges_proxy(self):
+        """Test saving a movie sends its keys to the proxy after commit"""
+        proxy = StandInProxy()
+        threading.Thread(target=proxy.serve_forever, args=(0.01,), daemon=True).start()
+        self.addCleanup(proxy.server_close)
+        self.addCleanup(proxy.shutdown)
+        with override_settings(PURGE_URL=proxy.url, CACHE_IS_SHARED=True):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.movie.name = "Edge Movie Returns"
+                self.movie.save()
+            edgecache.dispatcher.join()
+        self.assertEqual(proxy.purges, [[f'movie-{self.movie.id}', 'movies']])
+    
+    @override_settings(PURGE_URL='http://proxy.invalid/', PAGE_CACHE_TIMEOUT=60)
+    def test_repurge_unless_page_cache_shared(self):
+        """Test edits are purged again once per-process page caches expire"""
+        for shared, repurges in [(True, []), (False, [mock.call(['movies', 'movie-1'], 61)])]:
+            with override_settings(CACHE_IS_SHARED=shared), \
+                    mock.patch.object(edgecache.dispatcher, 'purge'), \
+                    mock.patch.object(edgecache.dispatcher, 'purge_later') as purge_later:
+                edgecache.dispatcher.purge_edit(['movies', 'movie-1'])
+            self.assertEqual(purge_later.call_args_list, repurges)
+    
+    def test_delayed_purge_sent(self):
+        """Test delayed purges reach the proxy, merged into one request"""
+        proxy = StandInProxy()
+        threading.Thread(target=proxy.serve_forever, args=(0.01,), daemon=True).start()
+        self.addCleanup(proxy.server_close)
+        self.addCleanup(proxy.shutdown)
+        with override_settings(PURGE_URL=proxy.url):
+            edgecache.dispatcher.purge_later(['movie-1'], 0.05)
+            edgecache.dispatcher.purge_later(['movies'], 0)
+            deadline = time.monotonic() + 2
+            while not proxy.purges and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertEqual(proxy.purges, [['movie-1', 'movies']])
+    
+    def test_unreachable_proxy_logged(self):
+        """Test a failed purge is logged and never raised into the save"""
+        with override_settings(PURGE_URL='http://127.0.0.1:9/', PURGE_TIMEOUT=1,
+                               CACHE_IS_SHARED=True), \
+                self.assertLogs('movie.edgecache', 'WARNING'):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.movie.delete()
+            edgecache.dispatcher.join()
+
+
+@override_settings(RATE_LIMITS={'movie_search': {'rate': 1, 'burst': 2}}, RATE_LIMIT_PROXY_COUNT=1)
+class RateLimitTestCase(TestCase):
+    """Test per-client token buckets and load shedding"""
+    
+    def setUp(self):
+        """Start every test with empty buckets"""
+        cache.clear()
+    
+    def search(self, **extra):
+        return self.client.get(reverse('movie_search'), {'genre': 'Drama'}, **extra)
+    
+    def test_bucket_refills(self):
+        """Test a bucket allows its burst, then refills at its rate"""
+        now = 1_000_000
+        self.assertEqual(ratelimit.take_token('bucket', 2, 3, now), 0)
+        self.assertEqual(ratelimit.take_token('bucket', 2, 3, now), 0)
+        self.assertEqual(ratelimit.take_token('bucket', 2, 3, now), 0)
+        self.assertAlmostEqual(ratelimit.take_token('bucket', 2, 3, now), 0.5)
+        self.assertEqual(ratelimit.take_token('bucket', 2, 3, now + 500), 0)
+        self.assertGreater(ratelimit.take_token('bucket', 2, 3, now + 500), 0)
+    
+    def test_search_limited_per_client(self):
+        """Test a client over its search limit gets a 429 with Retry-After"""
+        client_a = {'HTTP_X_FORWARDED_FOR': '203.0.113.1'}
+        self.assertEqual(self.search(**client_a).status_code, 200)
+        self.assertEqual(self.search(**client_a).status_code, 200)
+        response = self.search(**client_a)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+        # Another client, and other routes, are unaffected.
+        self.assertEqual(self.search(HTTP_X_FORWARDED_FOR='203.0.113.2').status_code, 200)
+        self.assertEqual(self.client.get(reverse('movie_list'), **client_a).status_code, 200)
+    
+    def test_spoofed_forwarded_for_ignored(self):
+        """Test only the address added by the trusted proxy identifies a client"""
+        for spoofed in ['10.0.0.1', '10.0.0.2']:
+            response = self.search(HTTP_X_FORWARDED_FOR=f'{spoofed}, 203.0.113.9')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.search(HTTP_X_FORWARDED_FOR='10.0.0.3, 203.0.113.9').status_code, 429)
+    
+    @override_settings(RATE_LIMIT_API_KEYS={'partner-key'})
+    def test_known_api_key_has_own_bucket(self):
+        """Test a known API key is limited separately from its IP"""
+        for _ in range(2):
+            self.search()
+        self.assertEqual(self.search().status_code, 429)
+        self.assertEqual(self.search(HTTP_X_API_KEY='partner-key').status_code, 200)
+        self.assertEqual(self.search(HTTP_X_API_KEY='made-up-key').status_code, 429)
+    
+    @override_settings(LOAD_SHED_QUEUE_MS=1000)
+    def test_queued_requests_shed(self):
+        """Test requests that queued too long get a 503 straight away"""
+        now = time.time()
+        response = self.client.get(reverse('movie_detail', kwargs={'id': 1}),
+                                   HTTP_X_REQUEST_START=f't={now - 5:.3f}')
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+        response = self.client.get(reverse('home'), HTTP_X_REQUEST_START=str(int(now * 1000)))
+        self.assertEqual(response.status_code, 200)
+    
+    def test_queue_time_formats(self):
+        """Test X-Request-Start in seconds, milliseconds and microseconds"""
+        now_ms = 1_700_000_000_000
+        for value in ['t=1699999999.5', '1699999999500', '1699999999500000']:
+            request = mock.Mock(META={'HTTP_X_REQUEST_START': value})
+            self.assertAlmostEqual(ratelimit.queue_time_ms(request, now_ms), 500, places=0)
+        self.assertIsNone(ratelimit.queue_time_ms(mock.Mock(META={}), now_ms))
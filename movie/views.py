@@ -1,20 +1,43 @@
 from django.shortcuts import render, get_object_or_404
+from .cards import render_movie_cards
+from .edgecache import tag_response
+from .fastpath import template_engine_for
+from .forms import MovieFilterForm
 from .models import Movie
 
 def home(request):
     """Welcome homepage - no movies shown initially"""
-    return render(request, 'movie/home.html')
+    return render(request, 'movie/home.html', using=template_engine_for(request))
 
 def movie_list(request):
     """Display all movies when explicitly requested"""
-    movies = Movie.objects.all()
-    return render(request, 'movie/movie_list.html', {'movies': movies})
+    filter_form = MovieFilterForm(request.GET)
+    movies = list(filter_form.filter_queryset(Movie.objects.for_listing()))
+    response = render(request, 'movie/movie_list.html',
+                      {'movies': movies, 'cards': render_movie_cards(movies),
+                       'filter_form': filter_form},
+                      using=template_engine_for(request))
+    return tag_response(response, movies, listing=True)
 
 def movie_detail(request, id):
     movie = get_object_or_404(Movie, id=id)
-    return render(request, 'movie/movie_detail.html', {'movie': movie})
+    response = render(request, 'movie/movie_detail.html', {'movie': movie},
+                      using=template_engine_for(request))
+    return tag_response(response, [movie])
 
 def movie_search(request):
     genre = request.GET.get('genre', '')
-    movies = Movie.objects.filter(genre__icontains=genre) if genre else []
-    return render(request, 'movie/movie_search.html', {'movies': movies, 'genre': genre})
\ No newline at end of file
+    filter_form = MovieFilterForm(request.GET)
+    filter_form.is_valid()
+    # Gate on the cleaned value, so an invalid genre finds nothing rather than
+    # falling through to an unfiltered catalog.
+    if filter_form.cleaned_data.get('genre'):
+        movies = list(filter_form.filter_queryset(Movie.objects.for_listing(),
+                                                   genre_lookup='icontains'))
+    else:
+        movies = []
+    response = render(request, 'movie/movie_search.html',
+                      {'movies': movies, 'cards': render_movie_cards(movies), 'genre': genre,
+                       'filter_form': filter_form},
+                      using=template_engine_for(request))
+    return tag_response(response, movies, listing=True)
\ No newline at end of file
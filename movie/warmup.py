@@ -0,0 +1,126 @@
+"""
+Startup warmup for cold starts.
+
+``warm_up()`` builds the URL resolver, compiles the public templates and
+requests the ``WARMUP_URLS`` once so the card and page caches are filled
+before real traffic arrives. With gunicorn's ``preload_app`` it runs in the
+master, and workers inherit the warmed state copy-on-write.
+"""
+
+import io
+import logging
+import sys
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.template import TemplateDoesNotExist, engines
+from django.urls import get_resolver
+
+logger = logging.getLogger('movie.startup')
+
+WARMUP_TEMPLATES = [
+    'movie/home.html',
+    'movie/movie_list.html',
+    'movie/movie_detail.html',
+    'movie/movie_search.html',
+    'movie/includes/movie_card.html',
+]
+WARMUP_ENCODINGS = ['br, gzip', 'gzip', '']
+
+
+def warm_urls():
+    resolver = get_resolver()
+    resolver.reverse_dict  # noqa: B018 - builds the reverse lookup tables
+    resolver.resolve('/')
+
+
+def warm_templates():
+    for engine in engines.all():
+        for name in WARMUP_TEMPLATES:
+            try:
+                engine.get_template(name)
+            except TemplateDoesNotExist:
+                pass
+
+
+def warmup_host():
+    """A host name from ALLOWED_HOSTS that the warmup requests can use."""
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*':
+            return host.lstrip('.')
+    return 'localhost'
+
+
+def request(handler, url, accept_encoding=''):
+    """GET ``url`` through the WSGI ``handler``; return the status line."""
+    host = warmup_host()
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': url,
+        'QUERY_STRING': '',
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': host,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': host,
+        'HTTP_ACCEPT_ENCODING': accept_encoding,
+        'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http',
+    }
+    status = []
+    response = handler(environ, lambda s, headers: status.append(s))
+    b''.join(response)
+    response.close()
+    return status[0]
+
+
+def warm_caches(handler=None):
+    """Request each of ``WARMUP_URLS`` once per common Accept-Encoding."""
+    from django.core.handlers.wsgi import WSGIHandler
+
+    handler = handler or WSGIHandler()
+    for url in settings.WARMUP_URLS:
+        for accept_encoding in WARMUP_ENCODINGS:
+            status = request(handler, url, accept_encoding)
+            if not status.startswith('200'):
+                logger.warning('Warmup request for %s returned %s', url, status)
+                break
+
+
+def warm_up():
+    """Run every warmup step, logging (never raising) failures."""
+    started = time.perf_counter()
+    for step in (warm_urls, warm_templates, warm_caches):
+        try:
+            step()
+        except Exception:
+            logger.exception('Warmup step %s failed', step.__name__)
+    # Never hand an open database connection to forked workers.
+    connections.close_all()
+    logger.info('Warmup finished in %.0fms', (time.perf_counter() - started) * 1000)
+
+
+class FirstRequestTimer:
+    """WSGI wrapper logging how long after boot the first request completed."""
+
+    def __init__(self, application, booted_at):
+        self.application = application
+        self.booted_at = booted_at
+        self.pending = True
+
+    def __call__(self, environ, start_response):
+        if not self.pending:
+            return self.application(environ, start_response)
+        self.pending = False
+        started = time.perf_counter()
+        try:
+            return self.application(environ, start_response)
+        finally:
+            finished = time.perf_counter()
+            logger.info(
+                'First request served %.0fms after boot (request took %.0fms)',
+                (finished - self.booted_at) * 1000, (finished - started) * 1000,
+            )
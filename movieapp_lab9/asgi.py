@@ -3,6 +3,9 @@ ASGI config for movieapp_lab9 project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Requests for ``SSE_EVENTS_PATH`` are streamed by the catalog change feed in
+``movie.events``; everything else goes to Django.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -13,4 +16,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'movieapp_lab9.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after Django is set up so the app registry is ready.
+from django.conf import settings  # noqa: E402
+from movie.events import sse_application  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'] == settings.SSE_EVENTS_PATH:
+        await sse_application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
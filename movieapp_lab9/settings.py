@@ -45,14 +45,32 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'movie.ratelimit.RateLimitMiddleware',
+    'movie.slowqueries.SlowQueryMiddleware',
+    'movie.compression.CompressedPageMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'movie.edgecache.EdgeCacheMiddleware',
+    # Public catalog pages are answered here; everything below only runs
+    # for the admin and any view not listed in PUBLIC_FAST_PATH_VIEWS.
+    'movie.fastpath.PublicFastPathMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Anonymous read-only fast path (see movie/fastpath.py)
+PUBLIC_FAST_PATH = config('PUBLIC_FAST_PATH', default=True, cast=bool)
+PUBLIC_FAST_PATH_VIEWS = ['home', 'movie_list', 'movie_detail', 'movie_search']
+
+# Compressed, cached public pages (see movie/compression.py)
+COMPRESSED_PAGE_VIEWS = PUBLIC_FAST_PATH_VIEWS
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=860, cast=int)  # bytes
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 5
+PAGE_CACHE_TIMEOUT = config('PAGE_CACHE_TIMEOUT', default=60, cast=int)  # seconds, 0 disables
+
 ROOT_URLCONF = 'movieapp_lab9.urls'
 
 TEMPLATES = [
@@ -68,8 +86,32 @@ TEMPLATES = [
             ],
         },
     },
+    {
+        # Lean engine for fast-path pages: no per-request auth/messages work
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'NAME': 'public',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.request',
+            ],
+        },
+    },
 ]
 
+# In production, keep compiled templates in memory for the life of the worker
+# instead of relying on the loader defaults.
+if not DEBUG:
+    for engine in TEMPLATES:
+        engine['APP_DIRS'] = False
+        engine['OPTIONS']['loaders'] = [
+            ('django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ]),
+        ]
+
 WSGI_APPLICATION = 'movieapp_lab9.wsgi.application'
 
 
@@ -95,6 +137,148 @@ else:
     }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# The default in-process cache is per worker; point CACHE_BACKEND/CACHE_LOCATION
+# at a shared backend to share cached fragments between workers.
+
+CACHE_BACKEND = config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache')
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': config('CACHE_LOCATION', default='movieapp-lab9'),
+    }
+}
+
+# Local-memory and dummy caches are private to each process, so nothing
+# written by another process (run_jobs, a management command) reaches them.
+CACHE_IS_SHARED = not CACHE_BACKEND.endswith(('LocMemCache', 'DummyCache'))
+
+if CACHE_BACKEND.endswith('LocMemCache'):
+    # The in-process default holds only 300 entries; leave room for a card
+    # per movie plus the cached pages.
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=10000, cast=int),
+    }
+
+# Rendered movie cards are keyed on (id, updated) and a hash of the card
+# template, so neither edits nor deploys serve stale cards; the timeout only
+# bounds how long unused cards stay around.
+MOVIE_CARD_CACHE_TIMEOUT = config('MOVIE_CARD_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int)
+
+
+# HTTP caching by a CDN or reverse proxy (see movie/edgecache.py). Proxies
+# keep pages for s_maxage and are purged by Surrogate-Key on every edit;
+# browsers, which can't be purged, only for max_age.
+EDGE_CACHE_POLICIES = {
+    'home': {'max_age': 300, 's_maxage': 3600, 'stale_while_revalidate': 3600,
+             'vary': ['Accept-Encoding']},
+    'movie_list': {'max_age': 60, 's_maxage': 86400, 'stale_while_revalidate': 300,
+                   'vary': ['Accept-Encoding']},
+    'movie_detail': {'max_age': 300, 's_maxage': 86400, 'stale_while_revalidate': 3600,
+                     'vary': ['Accept-Encoding']},
+    'movie_search': {'max_age': 30, 's_maxage': 3600, 'stale_while_revalidate': 120,
+                     'vary': ['Accept-Encoding']},
+}
+SURROGATE_KEY_HEADER = 'Surrogate-Key'
+SURROGATE_KEY_MAX_MOVIES = 100  # listings with more movies are tagged by genre only
+# Purge endpoint of the proxy; purging is off when empty.
+PURGE_URL = config('PURGE_URL', default='')
+PURGE_METHOD = config('PURGE_METHOD', default='PURGE')
+PURGE_KEY_HEADER = config('PURGE_KEY_HEADER', default='Surrogate-Key')
+PURGE_AUTH_HEADER = config('PURGE_AUTH_HEADER', default='')
+PURGE_AUTH_TOKEN = config('PURGE_AUTH_TOKEN', default='')
+PURGE_TIMEOUT = 5  # seconds
+
+
+# Rate limiting and load shedding (see movie/ratelimit.py). Buckets are kept
+# in the cache; with the default per-process cache each worker has its own,
+# so RATE_LIMITS apply per worker (gunicorn warns at startup). Set
+# CACHE_BACKEND to Redis or Memcached, whose incr is atomic, for exact limits.
+RATE_LIMIT_ENABLED = config('RATE_LIMIT_ENABLED', default=True, cast=bool)
+# Token bucket per client and URL name: `burst` requests at once, refilled at
+# `rate` per second. Routes not listed here (e.g. the admin) are not limited.
+RATE_LIMITS = {
+    'home': {'rate': 10, 'burst': 50},
+    'movie_detail': {'rate': 10, 'burst': 50},
+    'movie_list': {'rate': 2, 'burst': 20},
+    'movie_search': {'rate': 1, 'burst': 10},
+}
+# Proxies in front of the app that append to X-Forwarded-For (1 on Render).
+RATE_LIMIT_PROXY_COUNT = config('RATE_LIMIT_PROXY_COUNT', default=0 if DEBUG else 1, cast=int)
+RATE_LIMIT_API_KEY_HEADER = 'HTTP_X_API_KEY'
+# Clients sending one of these keys get their own buckets instead of their IP's.
+RATE_LIMIT_API_KEYS = config('RATE_LIMIT_API_KEYS', default='', cast=lambda v: {s.strip() for s in v.split(',') if s.strip()})
+# Requests queued longer than this (from X-Request-Start) get a 503; 0 disables.
+LOAD_SHED_QUEUE_MS = config('LOAD_SHED_QUEUE_MS', default=2000, cast=int)
+LOAD_SHED_RETRY_AFTER = 5  # seconds
+
+
+# Background jobs (see movie/jobs.py and `manage.py run_jobs`)
+JOB_WORKER_PROCESSES = config('JOB_WORKER_PROCESSES', default=os.cpu_count() or 1, cast=int)
+JOB_WORKER_THREADS = config('JOB_WORKER_THREADS', default=4, cast=int)
+JOB_POLL_INTERVAL = 1.0  # seconds between polls of an empty queue
+JOB_RETRY_DELAY = 30  # seconds before the first retry; doubles on each attempt
+JOB_STALE_AFTER = 600  # seconds without progress before a running job is requeued
+
+
+# Server-Sent Events feed of catalog changes, served by the ASGI app only
+# (see movie/events.py)
+SSE_EVENTS_PATH = '/events/movies/'
+SSE_POLL_INTERVAL = 2.0  # seconds between change-log polls per worker
+SSE_POLL_MAX_BACKOFF = 30  # longest wait between polls after database errors
+SSE_HEARTBEAT = 15  # seconds between keep-alive comments
+SSE_RETRY_MS = 3000  # client reconnect delay
+SSE_QUEUE_SIZE = 100  # events buffered per client before it is dropped
+SSE_BACKLOG_LIMIT = 500  # events read per poll or resume query
+SSE_GAP_TIMEOUT = 10  # seconds to wait for a missing event id to commit
+SSE_EVENT_RETENTION = 60 * 60 * 24  # seconds change-log rows are kept
+SSE_PRUNE_INTERVAL = 60 * 60  # seconds between pruning passes in run_jobs
+
+
+# Startup warmup (see movie/warmup.py and gunicorn.conf.py)
+WARMUP_ON_START = config('WARMUP_ON_START', default=not DEBUG, cast=bool)
+WARMUP_URLS = ['/', '/movies/']
+
+
+# Logging
+# https://docs.djangoproject.com/en/5.2/topics/logging/
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'movie': {
+            'handlers': ['console'],
+            'level': config('MOVIE_LOG_LEVEL', default='WARNING'),
+        },
+        'movie.startup': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+
+# Slow-query log (see movie/slowqueries.py; report with manage.py slow_queries)
+SLOW_QUERY_LOG = config('SLOW_QUERY_LOG', default=True, cast=bool)
+SLOW_QUERY_THRESHOLD_MS = config('SLOW_QUERY_THRESHOLD_MS', default=100, cast=float)
+# Share of slow SELECTs whose plan is captured with EXPLAIN.
+SLOW_QUERY_EXPLAIN_RATE = config('SLOW_QUERY_EXPLAIN_RATE', default=0.1, cast=float)
+# EXPLAIN ANALYZE runs the query again; only used where the backend supports it.
+SLOW_QUERY_EXPLAIN_ANALYZE = config('SLOW_QUERY_EXPLAIN_ANALYZE', default=False, cast=bool)
+
+
+# Testing
+
+TEST_RUNNER = 'movie.test_runner.TimedTestRunner'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
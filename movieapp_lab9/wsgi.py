@@ -3,14 +3,29 @@ WSGI config for movieapp_lab9 project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
 
+With ``WARMUP_ON_START`` the app is warmed before it is returned, so under
+gunicorn's ``preload_app`` (see gunicorn.conf.py) the work happens once in the
+master and is shared with every worker.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 """
 
 import os
+import time
+
+BOOTED_AT = time.perf_counter()
 
-from django.core.wsgi import get_wsgi_application
+from django.core.wsgi import get_wsgi_application  # noqa: E402
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'movieapp_lab9.settings')
 
 application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+from movie.warmup import FirstRequestTimer, warm_up  # noqa: E402
+
+if settings.WARMUP_ON_START:
+    warm_up()
+
+application = FirstRequestTimer(application, BOOTED_AT)